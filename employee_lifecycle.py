@@ -1,9 +1,18 @@
+import argparse
+import glob
 import logging
 import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
 import time
+from datetime import datetime
 from scripts.db_connector import *
 from scripts.generate_dirty_data import *
 # Bronze
+from scripts.bronze_ingest import resolve_source_files
 from scripts.bronze_main_load import *
 from scripts.bronze_tmp_load import *
 # Silver
@@ -13,12 +22,20 @@ from scripts.silver_tmp_load import *
 # CDC
 from scripts.silver_cdc_detect import *
 from scripts.process_cdc import *
+from scripts.silver_history import clear_history
+from scripts.snapshot_delta import DELTA_EXTRACT_ENABLED, promote_snapshot, partition_snapshot, diff_partitions
 # Gold
 from scripts.gold_main_load import *
+from scripts.query_profiler import start_profile_run
 
 # Configuration
 SIMULATE_SOURCE_SYSTEM = True 
 
+# Daemon mode: watched folder, polling interval (seconds) and max files queued before the watcher waits
+WATCH_DIR = os.getenv("WATCH_DIR", os.path.join("sources", "inbox"))
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "2"))
+WATCH_MAX_PENDING = int(os.getenv("WATCH_MAX_PENDING", "4"))
+
 # Create log directory if it doesn't exist
 log_dir = os.path.join("output", "logs")
 if not os.path.exists(log_dir):
@@ -37,25 +54,37 @@ logging.basicConfig(
 
 logger = logging.getLogger("MAIN_PIPELINE")
 
-def execute_etl_steps(cycle_name):
+def _keeps_previous_snapshot():
+    """source_master.csv is only read by delta extraction and by the data simulator."""
+    return DELTA_EXTRACT_ENABLED or SIMULATE_SOURCE_SYSTEM
+
+def execute_etl_steps(cycle_name, source_files=None):
     """Orchestrates all ETL steps for a specific cycle."""
     try:
         logger.info(f"=== Starting {cycle_name} ETL ===")
+        run_id = start_profile_run()
         
         # Bronze
-        load_bronze_layer()
-        load_bronze_tmp_layer()
+        load_bronze_layer(source_files)
+        delta_staged = load_bronze_tmp_layer(source_files)
         
-        # Silver
-        load_silver_layer()
+        # Silver: built from a snapshot only once. Later cycles change it through CDC only,
+        # so the change set (and the SCD2 history) is the diff against the previous state.
+        if not silver_layer_exists():
+            load_silver_layer()
         load_silver_tmp_layer()
         
         # CDC
-        create_cdc_view()
+        # The view follows what was staged: a full snapshot (e.g. no previous one yet) needs the full outer join
+        create_cdc_view(delta_mode=delta_staged)
         process_cdc_changes()
+
+        # The processed snapshot becomes the baseline of the next delta and of the simulator's updates
+        if _keeps_previous_snapshot():
+            promote_snapshot(resolve_source_files(source_files))
         
         # Gold
-        load_gold_layer()
+        load_gold_layer(run_id)
         
         logger.info(f"=== Completed {cycle_name} ETL ===")
     except Exception as e:
@@ -79,9 +108,8 @@ def run_pipeline():
             generate_data()
             logger.info("Data generated successfully.")
         else:
-            source_file = os.path.join("sources", "employees_incoming.csv")
-            if not os.path.exists(source_file):
-                raise FileNotFoundError(f"Source file '{source_file}' not found!")
+            # Raises FileNotFoundError if the configured feed has no files
+            resolve_source_files()
 
         execute_etl_steps("CYCLE 1 (Initial)")
 
@@ -110,5 +138,233 @@ def run_pipeline():
         logger.error(f"Critical Pipeline Failure: {e}")
         raise e
 
+def _snapshot_date(path):
+    """Reads the snapshot date from a file name like 'employees_2025-03-31.csv' or 'employees_20250331.csv'."""
+    match = re.search(r"(\d{4})-?(\d{2})-?(\d{2})", os.path.basename(path))
+    if not match:
+        raise ValueError(f"No snapshot date in file name '{path}', expected e.g. 'employees_2025-03-31.csv'")
+    return datetime.strptime("".join(match.groups()), "%Y%m%d").date()
+
+def _check_snapshot_order(snapshot_files):
+    """Snapshot dates become valid_from/valid_to, so they must strictly increase."""
+    snapshot_dates = [_snapshot_date(path) for path in snapshot_files]
+    for index in range(1, len(snapshot_files)):
+        if snapshot_dates[index] <= snapshot_dates[index - 1]:
+            raise ValueError(
+                f"Backfill snapshots must have increasing dates: '{snapshot_files[index]}' ({snapshot_dates[index]}) "
+                f"does not come after '{snapshot_files[index - 1]}' ({snapshot_dates[index - 1]})"
+            )
+    return snapshot_dates
+
+def _reset_history_for_backfill(reset_history):
+    """
+    A backfill rebuilds Silver from its first snapshot, so existing history versions (with
+    later valid_from dates) would be closed before they start. History must be empty,
+    or cleared explicitly with --reset-history.
+    """
+    conn = None
+    try:
+        conn = db_connection()
+        cursor = conn.cursor()
+        version_count = clear_history(cursor)
+        if version_count and not reset_history:
+            raise RuntimeError(
+                f"silver.employees_history already holds {version_count} versions. A backfill replays the history "
+                f"from its first snapshot; rerun with --reset-history to clear it."
+            )
+        conn.commit()
+        if version_count:
+            logger.warning(f"{version_count} existing history versions cleared for the backfill.")
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise e
+    finally:
+        if conn:
+            cursor.close()
+            release_connection(conn)
+
+def run_backfill(snapshot_files, reset_history=False):
+    """
+    Replays an ordered list of snapshot files. Each file is partitioned once and
+    diffed against its predecessor; only the deltas go through Silver and CDC, so the
+    SCD2 history gets one version per snapshot date. Gold is recomputed once at the end.
+    """
+    logger.info("--------------------------------------------------")
+    logger.info(f"Backfill Started: {len(snapshot_files)} snapshots")
+    logger.info("--------------------------------------------------")
+
+    start_time = time.time()
+    enable_connection_reuse()
+
+    try:
+        snapshot_dates = _check_snapshot_order(snapshot_files)
+        _reset_history_for_backfill(reset_history)
+        run_id = start_profile_run()
+
+        with tempfile.TemporaryDirectory(prefix="backfill_") as work_dir:
+            first_file = snapshot_files[0]
+            logger.info(f"=== Backfill base snapshot: {first_file} ===")
+
+            # Base snapshot: full Silver build, then an empty delta opens its history versions
+            load_bronze_layer([first_file])
+            load_silver_layer()
+            load_bronze_tmp_layer(deltas=[])
+            load_silver_tmp_layer()
+            create_cdc_view(delta_mode=True)
+            process_cdc_changes(effective_at=snapshot_dates[0])
+
+            previous_parts = partition_snapshot([first_file], os.path.join(work_dir, "0"))
+
+            for index, snapshot_file in enumerate(snapshot_files[1:], start=1):
+                logger.info(f"=== Backfill snapshot {index}/{len(snapshot_files) - 1}: {snapshot_file} ===")
+                current_parts = partition_snapshot([snapshot_file], os.path.join(work_dir, str(index)))
+
+                load_bronze_tmp_layer(deltas=diff_partitions(previous_parts, current_parts))
+                load_silver_tmp_layer()
+                create_cdc_view(delta_mode=True)
+                process_cdc_changes(effective_at=snapshot_dates[index])
+
+                # The current partitions are the next baseline, the old ones are no longer needed
+                shutil.rmtree(os.path.dirname(previous_parts[0]))
+                previous_parts = current_parts
+
+        load_gold_layer(run_id)
+        if _keeps_previous_snapshot():
+            promote_snapshot([snapshot_files[-1]])
+
+        duration = round(time.time() - start_time, 2)
+        logger.info("--------------------------------------------------")
+        logger.info(f"Backfill Finished Successfully. Total Duration: {duration} seconds")
+        logger.info("--------------------------------------------------")
+
+    except Exception as e:
+        logger.error(f"Critical Backfill Failure: {e}")
+        raise e
+
+def _poll_watch_dir(pending, stop_event, last_seen, queued):
+    """One poll of the watched folder; stable files are queued and added to queued."""
+    for path in sorted(glob.glob(os.path.join(WATCH_DIR, "*.csv"))):
+        if path in queued:
+            continue
+
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            # Moved away between glob and stat, or not readable (yet)
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Cannot read '{path}', skipping it this poll: {e}")
+            continue
+
+        signature = (stat.st_size, stat.st_mtime)
+        if last_seen.get(path) != signature:
+            last_seen[path] = signature
+            continue
+
+        if pending.full():
+            logger.warning(f"Backpressure: {pending.qsize()} files pending, waiting before queueing more.")
+        while not stop_event.is_set():
+            try:
+                pending.put(path, timeout=WATCH_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+
+        queued.add(path)
+        last_seen.pop(path, None)
+
+def _watch_sources(pending, stop_event):
+    """
+    Polls the watched folder and queues files whose size and mtime are stable
+    across two polls (i.e. fully written). A full queue blocks the watcher,
+    so files arriving too fast simply wait on disk.
+    """
+    last_seen = {}
+    queued = set()
+
+    while not stop_event.is_set():
+        # A folder that is briefly unreadable (network share, permissions) must not kill the watcher
+        try:
+            _poll_watch_dir(pending, stop_event, last_seen, queued)
+            # Forget files that were moved away after processing
+            queued = {path for path in queued if os.path.exists(path)}
+        except OSError as e:
+            logger.error(f"Polling '{WATCH_DIR}' failed, retrying: {e}")
+        stop_event.wait(WATCH_POLL_SECONDS)
+
+def _archive_file(path, folder):
+    """Moves a handled file out of the watched folder, suffixing its name instead of overwriting an earlier one."""
+    name, extension = os.path.splitext(os.path.basename(path))
+    target = os.path.join(folder, name + extension)
+    suffix = 1
+    while os.path.exists(target):
+        target = os.path.join(folder, f"{name}_{suffix}{extension}")
+        suffix += 1
+    shutil.move(path, target)
+    return target
+
+def run_daemon():
+    """
+    Long-running mode: every new snapshot file dropped into WATCH_DIR is processed
+    as a micro-batch, reusing pooled connections and warm cleaning caches.
+    """
+    logger.info("--------------------------------------------------")
+    logger.info(f"Employee Lifecycle Daemon Started. Watching '{WATCH_DIR}'")
+    logger.info("--------------------------------------------------")
+
+    processed_dir = os.path.join(os.path.dirname(WATCH_DIR), "processed")
+    failed_dir = os.path.join(os.path.dirname(WATCH_DIR), "failed")
+    for folder in (WATCH_DIR, processed_dir, failed_dir):
+        os.makedirs(folder, exist_ok=True)
+
+    enable_connection_reuse()
+
+    pending = queue.Queue(maxsize=WATCH_MAX_PENDING)
+    stop_event = threading.Event()
+    watcher = threading.Thread(target=_watch_sources, args=(pending, stop_event), daemon=True)
+    watcher.start()
+
+    try:
+        while True:
+            try:
+                path = pending.get(timeout=WATCH_POLL_SECONDS)
+            except queue.Empty:
+                if not watcher.is_alive():
+                    logger.error(f"Watcher of '{WATCH_DIR}' stopped, no new files can be picked up. Daemon exiting.")
+                    raise SystemExit(1)
+                continue
+            file_name = os.path.basename(path)
+            start_time = time.time()
+
+            # One bad file must not stop the daemon
+            try:
+                execute_etl_steps(f"MICRO-BATCH {file_name}", [path])
+                target_dir = processed_dir
+                logger.info(f"Micro-batch '{file_name}' finished in {round(time.time() - start_time, 2)} seconds.")
+            except Exception as e:
+                target_dir = failed_dir
+                logger.error(f"Micro-batch '{file_name}' failed: {e}")
+
+            try:
+                logger.info(f"'{file_name}' moved to '{_archive_file(path, target_dir)}'.")
+            except OSError as move_error:
+                logger.error(f"Could not move '{file_name}' to '{target_dir}': {move_error}")
+
+    except KeyboardInterrupt:
+        logger.info("Daemon stopped.")
+    finally:
+        stop_event.set()
+
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Employee Lifecycle Data Pipeline")
+    parser.add_argument("--daemon", action="store_true", help=f"watch '{WATCH_DIR}' and process new snapshot files continuously")
+    parser.add_argument("--backfill", nargs="+", metavar="SNAPSHOT", help="replay snapshot files in the given order")
+    parser.add_argument("--reset-history", action="store_true", help="with --backfill, clear an existing employee history first")
+    args = parser.parse_args()
+
+    if args.backfill:
+        run_backfill(args.backfill, args.reset_history)
+    elif args.daemon:
+        run_daemon()
+    else:
+        run_pipeline()
\ No newline at end of file
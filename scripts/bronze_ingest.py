@@ -0,0 +1,115 @@
+import pandas as pd
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from scripts.db_connector import get_connection_pool
+from scripts.sql_backend import is_embedded
+
+logger = logging.getLogger(__name__)
+
+# Default feed: a single file, a directory or a glob can be set with SOURCE_FILES
+DEFAULT_SOURCE = os.path.join("sources", "employees_incoming.csv")
+
+# Previous snapshot used for delta detection, never ingested as a feed file
+MASTER_FILE_NAME = "source_master.csv"
+
+SOURCE_COLUMNS = [
+    "employee_id", "first_name", "last_name", "department", "email", "phone",
+    "status", "salary", "joining_date", "termination_date", "address"
+]
+
+def resolve_source_files(source=None):
+    """
+    Expands the source setting into a sorted list of CSV files.
+    Accepts a file path, a directory, a glob pattern or an explicit list of files.
+    """
+    if source is None:
+        source = os.getenv("SOURCE_FILES", DEFAULT_SOURCE)
+
+    if isinstance(source, (list, tuple)):
+        # A listed file that is missing would turn all of its employees into deletes, never skip it
+        missing = [f for f in source if not os.path.isfile(f)]
+        if missing:
+            error_msg = f"Source files not found: {missing}"
+            logger.error(error_msg)
+            raise FileNotFoundError(error_msg)
+        files = list(source)
+    else:
+        pattern = os.path.join(source, "*.csv") if os.path.isdir(source) else source
+        files = [f for f in sorted(glob.glob(pattern)) if os.path.isfile(f)]
+
+    files = [f for f in files if os.path.basename(f) != MASTER_FILE_NAME]
+
+    if not files:
+        error_msg = f"Source file not found: {source}"
+        logger.error(error_msg)
+        raise FileNotFoundError(error_msg)
+
+    return files
+
+def _load_source_file(table, csv_path, ingestion_timestamp=None):
+    """
+    Worker: parses one CSV file and inserts it on a pooled connection.
+    Every row is tagged with the file name for lineage, and with the batch
+    timestamp when one is given (otherwise the column default applies).
+    """
+    df = pd.read_csv(csv_path)
+
+    #NaN to None
+    df = df.where(pd.notnull(df), None)
+
+    lineage = (os.path.basename(csv_path),)
+    insert_columns = SOURCE_COLUMNS + ["source_file"]
+    if ingestion_timestamp is not None:
+        lineage += (ingestion_timestamp,)
+        insert_columns.append("ingestion_timestamp")
+
+    data_tuples = [row + lineage for row in df[SOURCE_COLUMNS].itertuples(index=False, name=None)]
+
+    insert_query = f'''
+    INSERT INTO {table} ({", ".join(insert_columns)})
+    VALUES ({", ".join(["%s"] * len(insert_columns))})
+    '''
+
+    connection_pool = get_connection_pool()
+    conn = connection_pool.getconn()
+    try:
+        cursor = conn.cursor()
+        cursor.executemany(insert_query, data_tuples)
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        connection_pool.putconn(conn)
+
+    return len(data_tuples)
+
+def ingest_source_files(table, source_files, ingestion_timestamp=None):
+    """
+    Loads every source file into the given Bronze table, optionally under one batch timestamp.
+    Files are parsed in parallel across a process pool, so the total time follows
+    the largest file instead of the sum of all files.
+    """
+    max_workers = int(os.getenv("BRONZE_INGEST_WORKERS", os.cpu_count() or 1))
+    workers = max(1, min(len(source_files), max_workers))
+
+    # The embedded database file can only be written by one process
+    if is_embedded():
+        workers = 1
+
+    if workers == 1:
+        row_counts = [_load_source_file(table, path, ingestion_timestamp) for path in source_files]
+    else:
+        logger.info(f"Ingesting {len(source_files)} files with {workers} worker processes.")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            row_counts = list(executor.map(
+                _load_source_file, [table] * len(source_files), source_files, [ingestion_timestamp] * len(source_files)
+            ))
+
+    for path, row_count in zip(source_files, row_counts):
+        logger.info(f"'{path}' loaded into '{table}'. Rows: {row_count}")
+
+    return sum(row_counts)
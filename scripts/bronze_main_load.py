@@ -1,103 +1,186 @@
-import pandas as pd
 import logging
 import os
-from scripts.db_connector import db_connection, setup_logging
+import re
+from datetime import datetime, timedelta
+from scripts.db_connector import db_connection, setup_logging, release_connection
+from scripts.bronze_ingest import resolve_source_files, ingest_source_files
+from scripts.sql_backend import is_embedded
 
 #Logger Setup
 logger = logging.getLogger(__name__)
 
-def load_bronze_layer():
+# Days of raw batches kept in bronze.employees; 0 keeps every batch
+BRONZE_RETENTION_DAYS = int(os.getenv("BRONZE_RETENTION_DAYS", "30"))
+
+# "drop" deletes expired partitions, "detach" keeps them as standalone tables for archiving
+BRONZE_RETENTION_MODE = os.getenv("BRONZE_RETENTION_MODE", "drop").lower()
+
+BATCH_TABLE = "bronze.ingestion_batches"
+
+# Day partitions created by ensure_day_partition(); other partitions are never touched by retention
+DAY_PARTITION_PATTERN = re.compile(r"employees_p(\d{8})")
+
+def create_bronze_table(cursor):
+    """
+    Creates the append-only Bronze table, partitioned by ingestion day on PostgreSQL
+    (a plain table on the embedded backend), and the batch log next to it.
+    """
+    if not is_embedded():
+        # Before partitioning, Bronze was a plain table rebuilt on every run
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('bronze.employees');")
+        row = cursor.fetchone()
+        if row and row[0] == "r":
+            cursor.execute("DROP TABLE bronze.employees;")
+            logger.warning("Legacy non-partitioned Bronze table dropped.")
+
+    partition_clause = "" if is_embedded() else "PARTITION BY RANGE (ingestion_timestamp)"
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS bronze.employees (
+        employee_id INT,
+        first_name TEXT,
+        last_name TEXT,
+        department TEXT,
+        email TEXT,
+        phone TEXT,
+        status TEXT,
+        salary TEXT,
+        joining_date TEXT,
+        termination_date TEXT,
+        address TEXT,
+        source_file TEXT,
+        ingestion_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) {partition_clause}
+    ''')
+
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {BATCH_TABLE}(
+        ingestion_timestamp TIMESTAMP PRIMARY KEY,
+        source_files TEXT,
+        row_count INT
+    )
+    ''')
+
+def _partition_name(day):
+    return f"bronze.employees_p{day:%Y%m%d}"
+
+def ensure_day_partition(cursor, day):
+    """Creates the partition holding one ingestion day, if it does not exist yet."""
+    if is_embedded():
+        return
+
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {_partition_name(day)}
+    PARTITION OF bronze.employees
+    FOR VALUES FROM ('{day:%Y-%m-%d}') TO ('{day + timedelta(days=1):%Y-%m-%d}');
+    ''')
+
+def apply_bronze_retention(cursor, batch_day, retention_days=BRONZE_RETENTION_DAYS, mode=BRONZE_RETENTION_MODE):
+    """
+    Removes ingestion days older than the retention window, a whole partition at a time.
+    """
+    if retention_days <= 0:
+        return
+
+    cutoff = batch_day - timedelta(days=retention_days)
+
+    if is_embedded():
+        cursor.execute("DELETE FROM bronze.employees WHERE ingestion_timestamp < %s;", (cutoff,))
+        logger.info(f"Bronze retention: {cursor.rowcount} rows older than {cutoff:%Y-%m-%d} deleted.")
+    else:
+        cursor.execute('''
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'bronze.employees'::regclass
+        ORDER BY 1;
+        ''')
+        for (partition,) in cursor.fetchall():
+            match = DAY_PARTITION_PATTERN.fullmatch(partition)
+            if not match:
+                continue
+            partition_day = datetime.strptime(match.group(1), "%Y%m%d").date()
+            if partition_day >= cutoff:
+                continue
+
+            if mode == "detach":
+                cursor.execute(f"ALTER TABLE bronze.employees DETACH PARTITION bronze.{partition};")
+                logger.info(f"Bronze retention: partition bronze.{partition} detached.")
+            else:
+                cursor.execute(f"DROP TABLE bronze.{partition};")
+                logger.info(f"Bronze retention: partition bronze.{partition} dropped.")
+
+    cursor.execute(f"DELETE FROM {BATCH_TABLE} WHERE ingestion_timestamp < %s;", (cutoff,))
+
+def current_bronze_batch(cursor):
+    """Ingestion timestamp of the latest complete Bronze batch."""
+    cursor.execute(f"SELECT MAX(ingestion_timestamp) FROM {BATCH_TABLE};")
+    batch_timestamp = cursor.fetchone()[0]
+    if batch_timestamp is None:
+        raise RuntimeError("No Bronze batch loaded yet, run the Bronze load first.")
+    return batch_timestamp
+
+def load_bronze_layer(source_files=None):
     conn = None
+    pending_batch = None
     try:
         conn = db_connection()
         cursor = conn.cursor()
         logger.info("Database connection established for Bronze Layer.")
 
-        #STEP 1: READ DATA FROM NEW SOURCE FOLDER
-        csv_path = os.path.join("sources", "employees_incoming.csv")
-        
-        if not os.path.exists(csv_path):
-            error_msg = f"Source file not found at: {csv_path}"
-            logger.error(error_msg)
-            raise FileNotFoundError(error_msg)
-            
-        df = pd.read_csv(csv_path)
-        
-        #NaN to None
-        df = df.where(pd.notnull(df), None)
-        logger.info(f"CSV file read successfully from '{csv_path}'. Rows: {len(df)}")
-
-        #STEP 2: SCHEMA REFRESH
-        cursor.execute("DROP TABLE IF EXISTS bronze.employees;")
+        #STEP 1: RESOLVE SOURCE FILES
+        source_files = resolve_source_files(source_files)
+        logger.info(f"Source files resolved: {source_files}")
+
+        #STEP 2: SCHEMA AND PARTITION
+        create_bronze_table(cursor)
+
+        # One timestamp for the whole batch: it is the partition key and the batch id Silver reads
+        cursor.execute("SELECT LOCALTIMESTAMP;")
+        batch_timestamp = cursor.fetchone()[0]
+        ensure_day_partition(cursor, batch_timestamp.date())
         conn.commit()
-        logger.info("Old Bronze table dropped.")
-
-        create_table_query = '''
-        CREATE TABLE IF NOT EXISTS bronze.employees (
-            employee_id INT,
-            first_name TEXT,
-            last_name TEXT,
-            department TEXT,
-            email TEXT,
-            phone TEXT,
-            status TEXT,
-            salary TEXT,
-            joining_date TEXT,
-            termination_date TEXT,
-            address TEXT,
-            ingestion_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        pending_batch = batch_timestamp
+        logger.info(f"Bronze batch {batch_timestamp} prepared.")
+
+        #STEP 3: DATA INGESTION (append-only)
+        row_count = ingest_source_files("bronze.employees", source_files, batch_timestamp)
+
+        cursor.execute(
+            f"INSERT INTO {BATCH_TABLE} (ingestion_timestamp, source_files, row_count) VALUES (%s, %s, %s);",
+            (batch_timestamp, ",".join(os.path.basename(path) for path in source_files), row_count)
         )
-        '''
-        cursor.execute(create_table_query)
         conn.commit()
-        logger.info("Bronze table created successfully.")
+        pending_batch = None
+        logger.info(f"{row_count} rows appended to Bronze Layer successfully.")
 
-        #STEP 3: DATA INGESTION
-        cursor.execute("TRUNCATE TABLE bronze.employees;")
-        conn.commit()
-        
-        insert_query = '''
-        INSERT INTO bronze.employees (
-            employee_id, first_name, last_name, department, email, phone, 
-            status, salary, joining_date, termination_date, address
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        '''
-
-        data_tuples = []
-        for _, row in df.iterrows():
-            data_tuples.append((
-                row["employee_id"],
-                row["first_name"],
-                row["last_name"],
-                row["department"],
-                row["email"],
-                row["phone"],
-                row["status"],
-                row["salary"],
-                row["joining_date"],
-                row["termination_date"],
-                row["address"]
-            ))
-
-        cursor.executemany(insert_query, data_tuples)
+        #STEP 4: RETENTION
+        apply_bronze_retention(cursor, batch_timestamp.date())
         conn.commit()
-        logger.info(f"{len(data_tuples)} rows inserted into Bronze Layer successfully.")
 
     except Exception as e:
         logger.error(f"Bronze Load Failed: {e}")
         if conn:
             conn.rollback()
             logger.warning("Transaction rolled back due to error.")
+            # Files are committed one by one; remove the rows of the incomplete batch
+            if pending_batch is not None:
+                try:
+                    cursor.execute("DELETE FROM bronze.employees WHERE ingestion_timestamp = %s;", (pending_batch,))
+                    conn.commit()
+                except Exception as cleanup_error:
+                    logger.error(
+                        f"Rows of the incomplete Bronze batch {pending_batch} could not be removed "
+                        f"(Silver never reads them, the batch is not recorded): {cleanup_error}"
+                    )
         raise e
 
     finally:
         if conn:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             logger.info("Database connection closed.")
 
 # Only setup logging if run directly (Standalone Mode)
 if __name__ == "__main__":
     setup_logging("bronze_main_load")
-    load_bronze_layer()
\ No newline at end of file
+    load_bronze_layer()
@@ -1,17 +1,26 @@
-import pandas as pd
 import logging
 import os
-from scripts.db_connector import db_connection, setup_logging
+from scripts.db_connector import db_connection, setup_logging, release_connection
+from scripts.bronze_ingest import resolve_source_files, ingest_source_files
+from scripts.snapshot_delta import DELTA_EXTRACT_ENABLED, MASTER_FILE, extract_snapshot_delta, stage_delta
 
 logger = logging.getLogger(__name__)
 
-def load_bronze_tmp_layer():
+def load_bronze_tmp_layer(source_files=None, deltas=None):
+    """
+    Stages the incoming snapshot (or only its delta) into bronze.tmp_employees.
+    Precomputed (delta_action, record) pairs can be passed in, e.g. by the backfill.
+    Returns True when a delta was staged, False for a full snapshot.
+    """
     conn = None
     try:
         conn = db_connection()
         cursor = conn.cursor()
         logger.info("Database connection established for Bronze TMP Layer.")
 
+        if deltas is None:
+            source_files = resolve_source_files(source_files)
+
         #STEP 1: SCHEMA REFRESH
         cursor.execute("DROP TABLE IF EXISTS bronze.tmp_employees;")
         conn.commit()
@@ -30,7 +39,9 @@ def load_bronze_tmp_layer():
             salary TEXT,
             joining_date TEXT,
             termination_date TEXT,
-            address TEXT
+            address TEXT,
+            source_file TEXT,
+            delta_action TEXT
         )
         '''
         cursor.execute(create_table_query)
@@ -41,50 +52,24 @@ def load_bronze_tmp_layer():
         cursor.execute("TRUNCATE TABLE bronze.tmp_employees;")
         conn.commit()
         
-        #STEP 2: READ SOURCE FILE
-        file_path = os.path.join("sources", "employees_incoming.csv")
-        
-        if not os.path.exists(file_path):
-            error_msg = f"Source file not found: {file_path}"
-            logger.error(error_msg)
-            raise FileNotFoundError(error_msg)
-
-        df = pd.read_csv(file_path)
-        
-        #NaN to Null
-        df = df.where(pd.notnull(df), None)
-        logger.info(f"CSV file read successfully. Rows to insert: {len(df)}")
-
-        # STEP 3: BULK INSERTION
-        insert_query = '''
-        INSERT INTO bronze.tmp_employees (
-            employee_id, first_name, last_name, department, email, phone, 
-            status, salary, joining_date, termination_date, address
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        '''
-
-        # Converting DataFrame rows to a list of tuples for executemany
-        data_tuples = []
-        for _, row in df.iterrows():
-            data_tuples.append((
-                row["employee_id"],
-                row["first_name"],
-                row["last_name"],
-                row["department"],
-                row["email"],
-                row["phone"],
-                row["status"],
-                row["salary"],
-                row["joining_date"],
-                row["termination_date"],
-                row["address"]
-            ))
-
-        #Executemany is significantly faster than looping with execute
-        cursor.executemany(insert_query, data_tuples)
-        conn.commit()
-        logger.info(f"Successfully inserted {len(data_tuples)} rows into 'bronze.tmp_employees'.")
+        #STEP 2: DELTA EXTRACTION OR PARALLEL INGESTION
+        if deltas is not None:
+            counts = stage_delta(cursor, deltas)
+            conn.commit()
+            logger.info(f"Successfully staged {sum(counts.values())} precomputed delta rows into 'bronze.tmp_employees'.")
+            return True
+        elif DELTA_EXTRACT_ENABLED and os.path.exists(MASTER_FILE):
+            logger.info(f"Delta mode: diffing '{MASTER_FILE}' against the incoming snapshot.")
+            counts = extract_snapshot_delta(cursor, [MASTER_FILE], source_files)
+            conn.commit()
+            logger.info(f"Successfully staged {sum(counts.values())} delta rows into 'bronze.tmp_employees'.")
+            return True
+        else:
+            if DELTA_EXTRACT_ENABLED:
+                logger.warning(f"No previous snapshot '{MASTER_FILE}', staging the full snapshot.")
+            row_count = ingest_source_files("bronze.tmp_employees", source_files)
+            logger.info(f"Successfully inserted {row_count} rows into 'bronze.tmp_employees'.")
+            return False
 
     except Exception as e:
         logger.error(f"Bronze TMP Load Failed: {e}")
@@ -96,7 +81,7 @@ def load_bronze_tmp_layer():
     finally:
         if conn:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             logger.info("Connection closed.")
 
 # Only run setup_logging if this file is executed directly
@@ -1,12 +1,25 @@
 import psycopg2
 import os
 import logging
+from psycopg2 import pool
 from dotenv import load_dotenv
+from scripts.sql_backend import is_embedded, DuckDBConnection, EmbeddedConnectionPool
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# employee_id is an INT column; range chunks and shards cover the whole id space
+MIN_EMPLOYEE_ID = -2147483649
+MAX_EMPLOYEE_ID = 2147483647
+
+# Process-wide connection pool, created lazily by get_connection_pool()
+_connection_pool = None
+_connection_pool_pid = None
+
+# Long-running processes (daemon mode) hand out pooled connections from db_connection()
+_reuse_connections = False
+
 def setup_logging(script_name):
     """
     Configures logging for standalone script execution.
@@ -32,18 +45,28 @@ def setup_logging(script_name):
     )
     logger.info(f"--- Log Session Started for {script_name} ---")
 
+def _connection_params():
+    return dict(
+        host="localhost",
+        database=os.getenv("POSTGRES_DB"),
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        port=os.getenv("POSTGRES_PORT", "5433")
+    )
+
 def db_connection():
     """
-    Establishes a connection to the PostgreSQL database
+    Establishes a connection to the PostgreSQL database (or the embedded DuckDB file with DB_BACKEND=duckdb).
+    With connection reuse enabled, the connection comes from the process pool.
     """
     try:
-        conn = psycopg2.connect(
-            host="localhost",
-            database=os.getenv("POSTGRES_DB"),
-            user=os.getenv("POSTGRES_USER"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            port=os.getenv("POSTGRES_PORT", "5433")
-        )
+        if _reuse_connections:
+            return get_connection_pool().getconn()
+
+        if is_embedded():
+            return DuckDBConnection()
+
+        conn = psycopg2.connect(**_connection_params())
         return conn
     
     except Exception as e:
@@ -52,4 +75,61 @@ def db_connection():
             logger.error(error_msg)
         else:
             print(f"CRITICAL: {error_msg}")
-        raise e
\ No newline at end of file
+        raise e
+
+def get_connection_pool():
+    """
+    Returns the connection pool of the current process, creating it on first use.
+    A forked worker gets its own pool instead of reusing the parent's sockets.
+    """
+    global _connection_pool, _connection_pool_pid
+
+    if _connection_pool is None or _connection_pool_pid != os.getpid():
+        if is_embedded():
+            _connection_pool = EmbeddedConnectionPool()
+            _connection_pool_pid = os.getpid()
+            return _connection_pool
+
+        max_connections = int(os.getenv("POSTGRES_POOL_SIZE", "8"))
+        _connection_pool = pool.ThreadedConnectionPool(1, max_connections, **_connection_params())
+        _connection_pool_pid = os.getpid()
+        logger.info(f"Connection pool created (max {max_connections} connections).")
+
+    return _connection_pool
+
+def enable_connection_reuse():
+    """
+    Makes db_connection() hand out pooled connections, so repeated runs in the
+    same process skip the connection setup.
+    """
+    global _reuse_connections
+    _reuse_connections = True
+    logger.info("Connection reuse enabled.")
+
+def release_connection(conn):
+    """
+    Returns a connection obtained from db_connection(): back to the pool when
+    connection reuse is enabled, closed otherwise.
+    """
+    if _reuse_connections and _connection_pool_pid == os.getpid():
+        _connection_pool.putconn(conn)
+    else:
+        conn.close()
+
+def available_pool_connections():
+    """
+    Pooled connections free for workers: with connection reuse the caller's own
+    connection comes from the same pool.
+    """
+    max_connections = int(os.getenv("POSTGRES_POOL_SIZE", "8"))
+    return max_connections - (1 if _reuse_connections else 0)
+
+def id_range_clause(id_range, column="employee_id"):
+    """
+    Builds an 'AND lower < column <= upper' filter for chunked statements.
+    Returns an empty clause when no range is given.
+    """
+    if id_range is None:
+        return "", ()
+
+    return f" AND {column} > %s AND {column} <= %s", tuple(id_range)
@@ -52,10 +52,9 @@ def generate_data():
                     deps = ["Engineering", "Sales", "Marketing", "HR", "Finance"]
                     df.at[index, 'department'] = random.choice(deps)
 
-            # Update Master File (Refresh memory)
-            df.to_csv(MASTER_DB_FILE, index=False)
-            
-            # Create fresh file for Pipeline ingestion
+            # Create fresh file for Pipeline ingestion.
+            # The master file is refreshed by the pipeline once this snapshot is processed,
+            # so it stays the previous snapshot for delta detection until then.
             df.to_csv(OUTPUT_FILE, index=False)
             
             logger.info(f"Data updated ({updated_count} records modified). '{OUTPUT_FILE}' prepared.")
@@ -1,5 +1,7 @@
 import logging
-from scripts.db_connector import db_connection, setup_logging
+from scripts.db_connector import db_connection, setup_logging, release_connection
+from scripts.query_profiler import profiled_execute
+from scripts.gold_snapshots import GOLD_EXPORT_ENABLED, export_gold_snapshots, new_run_id
 
 # 1. Module-level logger setup
 logger = logging.getLogger(__name__)
@@ -26,7 +28,8 @@ def create_department_kpi(cursor):
     """
     cursor.execute(create_query)
     
-    # Finding the total salary for active employees
+    # Finding the total salary for active employees.
+    # Rows with invalid employment dates are quarantined during the Silver load, no status_flag filter needed.
     insert_query = """
     INSERT INTO gold.department_kpi
     SELECT 
@@ -43,12 +46,11 @@ def create_department_kpi(cursor):
             ) FILTER (WHERE joining_date IS NOT NULL))::INT as avg_tenure_days,
         CURRENT_DATE
     FROM silver.employees
-    WHERE status_flag = FALSE
     GROUP BY department
     ORDER BY total_salary_cost DESC;
     """
     
-    cursor.execute(insert_query)
+    profiled_execute(cursor, "gold_department_kpi", insert_query)
     logger.info(f"Department KPIs calculated. {cursor.rowcount} departments processed.")
 
 
@@ -86,11 +88,11 @@ def create_hiring_trends(cursor):
     ORDER BY 1 DESC;
     """
     
-    cursor.execute(insert_query)
+    profiled_execute(cursor, "gold_hiring_trends", insert_query)
     logger.info(f"Hiring trends calculated. {cursor.rowcount} years processed.")
 
 
-def load_gold_layer():
+def load_gold_layer(run_id=None):
     conn = None
     try:
         conn = db_connection()
@@ -111,9 +113,33 @@ def load_gold_layer():
     finally:
         if conn:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             logger.info("Connection closed.")
 
+    # Read-only consumers use the Parquet snapshots instead of querying the database
+    if GOLD_EXPORT_ENABLED:
+        publish_gold_snapshots(run_id or new_run_id())
+
+def publish_gold_snapshots(run_id):
+    """
+    Exports the committed Gold tables. A failed export does not fail the run: the Gold
+    tables are already committed and readers keep the previous snapshot until the next run.
+    """
+    conn = None
+    try:
+        conn = db_connection()
+        cursor = conn.cursor()
+        export_gold_snapshots(cursor, run_id)
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Gold Parquet export of run {run_id} failed, readers keep the previous snapshot: {e}")
+        if conn:
+            conn.rollback()
+    finally:
+        if conn:
+            cursor.close()
+            release_connection(conn)
+
 # 2. Standalone setup moved to the bottom
 if __name__ == "__main__":
     setup_logging("gold_main_load")
@@ -0,0 +1,103 @@
+import pandas as pd
+import glob
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Publish every Gold table as a Parquet snapshot after each load (needs pyarrow)
+GOLD_EXPORT_ENABLED = os.getenv("GOLD_EXPORT_ENABLED", "true").lower() == "true"
+
+GOLD_EXPORT_DIR = os.path.join("output", "gold")
+
+# Snapshot runs kept on disk, older ones are removed after a successful export
+GOLD_EXPORT_KEEP_RUNS = int(os.getenv("GOLD_EXPORT_KEEP_RUNS", "10"))
+
+# Readers follow this file: a snapshot only becomes visible once every table of its run is written
+LATEST_RUN_FILE = os.path.join(GOLD_EXPORT_DIR, "LATEST")
+
+GOLD_TABLES = {
+    "department_kpi": [
+        "department", "total_employees", "active_employees", "avg_salary",
+        "total_salary_cost", "avg_tenure_days", "last_updated"
+    ],
+    "hiring_trends": [
+        "hiring_year", "total_hires", "avg_starting_salary", "most_hired_dept", "last_updated"
+    ],
+}
+
+# table -> (run_id, DataFrame)
+_snapshot_cache = {}
+
+def new_run_id():
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+def _snapshot_path(table, run_id):
+    return os.path.join(GOLD_EXPORT_DIR, table, f"run_id={run_id}.parquet")
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def _remove_old_runs(keep_runs):
+    for table in GOLD_TABLES:
+        snapshots = sorted(glob.glob(os.path.join(GOLD_EXPORT_DIR, table, "run_id=*.parquet")))
+        for path in snapshots[:-keep_runs]:
+            os.remove(path)
+
+def export_gold_snapshots(cursor, run_id):
+    """
+    Writes every Gold table to output/gold/<table>/run_id=<run_id>.parquet, then moves
+    the LATEST pointer to this run. Runs after the Gold commit, on committed data.
+    """
+    for table, columns in GOLD_TABLES.items():
+        cursor.execute(f"SELECT {', '.join(columns)} FROM gold.{table};")
+        df = pd.DataFrame(cursor.fetchall(), columns=columns)
+
+        path = _snapshot_path(table, run_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+        logger.info(f"gold.{table} exported to '{path}'. Rows: {len(df)}")
+
+    def write_pointer(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(run_id)
+    _write_atomic(LATEST_RUN_FILE, write_pointer)
+
+    if GOLD_EXPORT_KEEP_RUNS > 0:
+        _remove_old_runs(GOLD_EXPORT_KEEP_RUNS)
+
+def latest_run_id():
+    """Run id of the newest complete Gold snapshot, None before the first export."""
+    try:
+        with open(LATEST_RUN_FILE, encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def read_gold_table(table):
+    """
+    Returns the latest Parquet snapshot of a Gold table without touching the database.
+    Snapshots are cached in-process and re-read only when a new run id is published.
+    The returned DataFrame is shared between callers and must not be modified.
+    """
+    if table not in GOLD_TABLES:
+        raise ValueError(f"Unknown Gold table '{table}', expected one of {list(GOLD_TABLES)}")
+
+    run_id = latest_run_id()
+    if run_id is None:
+        raise FileNotFoundError(f"No Gold snapshot published yet ('{LATEST_RUN_FILE}' not found)")
+
+    cached = _snapshot_cache.get(table)
+    if cached and cached[0] == run_id:
+        return cached[1]
+
+    df = pd.read_parquet(_snapshot_path(table, run_id))
+    _snapshot_cache[table] = (run_id, df)
+    logger.info(f"gold.{table} snapshot {run_id} loaded into the cache.")
+    return df
+
+def clear_gold_cache():
+    _snapshot_cache.clear()
@@ -1,73 +1,390 @@
 import logging
-from scripts.db_connector import db_connection, setup_logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from scripts.db_connector import (
+    db_connection, release_connection, setup_logging, id_range_clause, get_connection_pool,
+    available_pool_connections, MIN_EMPLOYEE_ID, MAX_EMPLOYEE_ID
+)
+from scripts.silver_history import HISTORY_COLUMNS, create_history_table, close_history_versions, open_history_versions
+from scripts.sql_backend import is_embedded, auto_id_column, row_hash_sql
+from scripts.query_profiler import profiled_execute
 
 logger = logging.getLogger(__name__)
 
-def process_insert(cursor):
+# Change set rows committed per chunk; 0 applies everything in a single transaction.
+# Smaller chunks hold row locks for less time and spread WAL, larger chunks give more throughput.
+CDC_BATCH_SIZE = int(os.getenv("CDC_BATCH_SIZE", "0"))
+
+# Concurrent partitions for catch-up loads; needs max_prepared_transactions >= workers on the server
+CDC_PARALLEL_WORKERS = int(os.getenv("CDC_PARALLEL_WORKERS", "0"))
+
+CDC_VIEW = "employees_cdc_view"
+CHANGE_SET_TABLE = "silver.cdc_change_set"
+
+def process_insert(cursor, source=CDC_VIEW, id_range=None, effective_at=None):
     logger.info("Checking for INSERT actions...")
-    cdc_insert_query = '''
+    range_filter, range_params = id_range_clause(id_range)
+    cdc_insert_query = f'''
     INSERT INTO silver.employees (
         employee_id, first_name, last_name, department, email, phone,
         status, salary, joining_date, termination_date, status_flag, address, updated_at
     )
     SELECT
         employee_id, first_name, last_name, department, email, phone,
-        status, salary, CURRENT_DATE, NULL, status_flag, address, CURRENT_DATE
-    FROM employees_cdc_view
-    WHERE cdc_action = 'INSERT'
+        status, salary, COALESCE(%s::DATE, CURRENT_DATE), NULL, status_flag, address, COALESCE(%s::DATE, CURRENT_DATE)
+    FROM {source}
+    WHERE cdc_action = 'INSERT'{range_filter}
     '''
-    cursor.execute(cdc_insert_query)
+    profiled_execute(cursor, "cdc_insert", cdc_insert_query, (effective_at, effective_at) + range_params)
     logger.info(f" -> {cursor.rowcount} rows inserted.")
 
-def process_update(cursor):
+def process_update(cursor, source=CDC_VIEW, id_range=None, effective_at=None):
     logger.info("Checking for UPDATE actions...")
-    cdc_update_query = '''
+    range_filter, range_params = id_range_clause(id_range, "view.employee_id")
+    # Every CDC hash column is written, salary included (it used to be detected as a change but never applied)
+    cdc_update_query = f'''
     UPDATE silver.employees AS main
-    SET 
+    SET
         first_name = view.first_name,
         last_name = view.last_name,
         department = view.department,
+        salary = view.salary,
         email = view.email,
         phone = view.phone,
         address = view.address,
         status_flag = view.status_flag,
         termination_date = CASE
-            WHEN view.status = 'Terminated' AND main.status != 'Terminated' THEN CURRENT_DATE
+            WHEN view.status = 'Terminated' AND main.status != 'Terminated' THEN COALESCE(%s::DATE, CURRENT_DATE)
             WHEN view.status = 'Active' THEN NULL
             ELSE main.termination_date
         END,
-        updated_at = CURRENT_DATE,
+        updated_at = COALESCE(%s::DATE, CURRENT_DATE),
         status = view.status
-    FROM employees_cdc_view AS view
-    WHERE main.employee_id = view.employee_id 
-        AND view.cdc_action = 'UPDATE';
+    FROM {source} AS view
+    WHERE main.employee_id = view.employee_id
+        AND view.cdc_action = 'UPDATE'{range_filter};
     '''
-    cursor.execute(cdc_update_query)
+    profiled_execute(cursor, "cdc_update", cdc_update_query, (effective_at, effective_at) + range_params)
     logger.info(f" -> {cursor.rowcount} rows updated.")
 
-def process_delete(cursor):
+def process_delete(cursor, source=CDC_VIEW, id_range=None):
     logger.info("Checking for DELETE actions...")
-    cdc_delete_query = '''
+    range_filter, range_params = id_range_clause(id_range)
+    cdc_delete_query = f'''
     DELETE FROM silver.employees
     WHERE employee_id IN (
         SELECT employee_id
-        FROM employees_cdc_view
-        WHERE cdc_action = 'DELETE'
+        FROM {source}
+        WHERE cdc_action = 'DELETE'{range_filter}
     )
     '''
-    cursor.execute(cdc_delete_query)
+    profiled_execute(cursor, "cdc_delete", cdc_delete_query, range_params)
     logger.info(f" -> {cursor.rowcount} rows deleted.")
 
-def process_cdc_changes():
+def apply_change_set(cursor, source=CDC_VIEW, id_range=None, effective_at=None):
+    """
+    Applies the change set (optionally one employee_id range of it) to Silver
+    and its SCD2 history. The caller owns the transaction.
+    """
+    # SCD2 history is closed before the apply, while the source still shows the change set
+    close_history_versions(cursor, effective_at, source, id_range)
+
+    # Dates written to Silver follow the snapshot date too, so a backfill does not stamp them with today
+    process_insert(cursor, source, id_range, effective_at)
+    process_update(cursor, source, id_range, effective_at)
+    process_delete(cursor, source, id_range)
+
+    open_history_versions(cursor, effective_at, id_range)
+
+def create_apply_run_table(cursor):
+    run_id_column = auto_id_column(cursor, "silver.cdc_apply_runs_seq")
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS silver.cdc_apply_runs(
+        run_id {run_id_column},
+        batch_size INT,
+        effective_at TIMESTAMP,
+        last_committed_id BIGINT,
+        status VARCHAR(15),
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP
+    )
+    ''')
+    # Tables created before runs were fingerprinted
+    cursor.execute("ALTER TABLE silver.cdc_apply_runs ADD COLUMN IF NOT EXISTS change_set_fingerprint TEXT;")
+
+def change_set_fingerprint(cursor):
+    """
+    Digest of the CDC input (silver.tmp_employees). A frozen change set is only valid
+    for the input it was computed from.
+    """
+    row_hash = row_hash_sql("tmp", HISTORY_COLUMNS + ["delta_action"])
+    cursor.execute(f'''
+    SELECT MD5(COALESCE(STRING_AGG({row_hash}, '' ORDER BY tmp.employee_id), ''))
+    FROM silver.tmp_employees AS tmp;
+    ''')
+    return cursor.fetchone()[0]
+
+def abandon_unfinished_runs(cursor, reason):
+    cursor.execute('''
+    UPDATE silver.cdc_apply_runs
+    SET status = 'ABANDONED', finished_at = CURRENT_TIMESTAMP
+    WHERE status = 'RUNNING';
+    ''')
+    if cursor.rowcount > 0:
+        logger.warning(f"{cursor.rowcount} unfinished CDC run(s) abandoned: {reason}.")
+
+def materialize_change_set(cursor):
+    """
+    Freezes the CDC view into a table. The view is recomputed on every read,
+    so a chunked or parallel apply needs a stable copy of the change set.
+    """
+    cursor.execute(f"DROP TABLE IF EXISTS {CHANGE_SET_TABLE};")
+    cursor.execute(f'''
+    CREATE TABLE {CHANGE_SET_TABLE} AS
+    SELECT * FROM {CDC_VIEW}
+    WHERE cdc_action <> 'NO_CHANGE';
+    ''')
+    change_count = cursor.rowcount
+    cursor.execute(f"CREATE INDEX cdc_change_set_employee_id_idx ON {CHANGE_SET_TABLE} (employee_id);")
+    if not is_embedded():
+        cursor.execute(f"ANALYZE {CHANGE_SET_TABLE};")
+    logger.info(f"Change set materialized: {change_count} rows.")
+    return change_count
+
+def _next_upper_bound(cursor, lower, batch_size):
+    cursor.execute(f'''
+    SELECT employee_id
+    FROM {CHANGE_SET_TABLE}
+    WHERE employee_id > %s
+    ORDER BY employee_id
+    OFFSET %s LIMIT 1
+    ''', (lower, batch_size - 1))
+    row = cursor.fetchone()
+    return row[0] if row else MAX_EMPLOYEE_ID
+
+def _apply_run_in_chunks(conn, cursor, run_id, lower, batch_size, effective_at):
+    chunk_count = 0
+    while lower < MAX_EMPLOYEE_ID:
+        upper = _next_upper_bound(cursor, lower, batch_size)
+        apply_change_set(cursor, CHANGE_SET_TABLE, (lower, upper), effective_at)
+
+        # Progress is committed with the chunk, so a crash resumes right after it
+        cursor.execute(
+            "UPDATE silver.cdc_apply_runs SET last_committed_id = %s WHERE run_id = %s;",
+            (upper, run_id)
+        )
+        conn.commit()
+        chunk_count += 1
+        logger.info(f"Chunk {chunk_count} committed (employee_id {lower} < id <= {upper}).")
+        lower = upper
+
+    cursor.execute(
+        "UPDATE silver.cdc_apply_runs SET status = 'COMPLETED', finished_at = CURRENT_TIMESTAMP WHERE run_id = %s;",
+        (run_id,)
+    )
+    conn.commit()
+    logger.info(f"CDC run {run_id} completed in {chunk_count} chunks.")
+
+def process_cdc_changes_batched(batch_size=CDC_BATCH_SIZE, effective_at=None):
+    """
+    Applies the CDC change set in employee_id range chunks, each in its own transaction.
+    Runs are recorded in silver.cdc_apply_runs; an unfinished run is resumed first.
+    """
+    conn = None
+    try:
+        conn = db_connection()
+        cursor = conn.cursor()
+        logger.info(f"Batched CDC apply started (batch size {batch_size}).")
+
+        create_history_table(cursor)
+        create_apply_run_table(cursor)
+        conn.commit()
+
+        cursor.execute('''
+        SELECT run_id, batch_size, effective_at, last_committed_id, change_set_fingerprint
+        FROM silver.cdc_apply_runs
+        WHERE status = 'RUNNING'
+        ORDER BY run_id DESC
+        LIMIT 1;
+        ''')
+        unfinished_run = cursor.fetchone()
+        fingerprint = change_set_fingerprint(cursor)
+        if unfinished_run:
+            run_id, run_batch_size, run_effective_at, last_committed_id, run_fingerprint = unfinished_run
+            if run_fingerprint == fingerprint:
+                logger.warning(f"Resuming CDC run {run_id} after employee_id {last_committed_id}.")
+                _apply_run_in_chunks(conn, cursor, run_id, last_committed_id, run_batch_size, run_effective_at)
+            else:
+                # The change set below is recomputed against the current Silver state and supersedes it
+                abandon_unfinished_runs(cursor, f"run {run_id} was frozen from a different input")
+                conn.commit()
+
+        materialize_change_set(cursor)
+        cursor.execute('''
+        INSERT INTO silver.cdc_apply_runs (batch_size, effective_at, last_committed_id, status, change_set_fingerprint)
+        VALUES (%s, COALESCE(%s::TIMESTAMP, LOCALTIMESTAMP), %s, 'RUNNING', %s)
+        RETURNING run_id, effective_at;
+        ''', (batch_size, effective_at, MIN_EMPLOYEE_ID, fingerprint))
+        run_id, run_effective_at = cursor.fetchone()
+        conn.commit()
+
+        _apply_run_in_chunks(conn, cursor, run_id, MIN_EMPLOYEE_ID, batch_size, run_effective_at)
+
+        cursor.execute("TRUNCATE TABLE silver.tmp_employees;")
+        conn.commit()
+        logger.info("Temporary silver table cleared.")
+
+    except Exception as e:
+        logger.error(f"Batched CDC apply failed: {e}")
+        if conn:
+            conn.rollback()
+        raise e
+
+    finally:
+        if conn:
+            cursor.close()
+            release_connection(conn)
+            logger.info("Connection closed.")
+
+def _partition_ranges(cursor, partitions):
+    """
+    Splits the change set into employee_id ranges of similar size.
+    The outer ranges are open-ended so together they cover every employee.
+    """
+    cursor.execute(f'''
+    SELECT MAX(employee_id)
+    FROM (
+        SELECT employee_id, NTILE(%s) OVER (ORDER BY employee_id) AS part
+        FROM {CHANGE_SET_TABLE}
+    ) AS parts
+    GROUP BY part
+    ORDER BY 1
+    ''', (partitions,))
+    upper_bounds = [row[0] for row in cursor.fetchall()][:-1] + [MAX_EMPLOYEE_ID]
+    lower_bounds = [MIN_EMPLOYEE_ID] + upper_bounds[:-1]
+    return list(zip(lower_bounds, upper_bounds))
+
+def _partition_gtrid(run_token, partition):
+    return f"cdc-{run_token}-{partition}"
+
+def _prepare_partition(connection_pool, run_token, partition, id_range, effective_at):
+    """
+    Worker: applies one range on its own pooled connection and leaves it PREPARED.
+    Nothing becomes visible until the coordinator commits every partition.
+    """
+    conn = connection_pool.getconn()
+    try:
+        conn.tpc_begin(conn.xid(0, _partition_gtrid(run_token, partition), "employee_lifecycle"))
+        apply_change_set(conn.cursor(), CHANGE_SET_TABLE, id_range, effective_at)
+        conn.tpc_prepare()
+        return conn
+    except Exception:
+        conn.tpc_rollback()
+        connection_pool.putconn(conn)
+        raise
+
+def process_cdc_changes_parallel(workers=CDC_PARALLEL_WORKERS, effective_at=None):
+    """
+    Applies the CDC change set as concurrent employee_id partitions, one pooled connection each.
+    Two-phase commit keeps Silver consistent with a single logical run: all partitions
+    are prepared first and committed only if every one of them succeeded.
+    """
     conn = None
-    try: 
+    prepared = []
+    committed = []
+    try:
+        conn = db_connection()
+        cursor = conn.cursor()
+        logger.info(f"Parallel CDC apply started ({workers} workers).")
+
+        create_history_table(cursor)
+        materialize_change_set(cursor)
+        cursor.execute("SELECT COALESCE(%s::TIMESTAMP, LOCALTIMESTAMP);", (effective_at,))
+        run_effective_at = cursor.fetchone()[0]
+        conn.commit()
+
+        id_ranges = _partition_ranges(cursor, workers)
+        run_token = uuid.uuid4().hex[:12]
+        connection_pool = get_connection_pool()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_prepare_partition, connection_pool, run_token, partition, id_range, run_effective_at)
+                for partition, id_range in enumerate(id_ranges)
+            ]
+            errors = []
+            for partition, future in enumerate(futures):
+                try:
+                    prepared.append((_partition_gtrid(run_token, partition), future.result()))
+                except Exception as e:
+                    errors.append(e)
+
+        if errors:
+            raise errors[0]
+
+        for gtrid, partition_conn in prepared:
+            partition_conn.tpc_commit()
+            committed.append(gtrid)
+        logger.info(f"CDC run {run_token}: {len(prepared)} partitions committed.")
+
+        cursor.execute("TRUNCATE TABLE silver.tmp_employees;")
+        conn.commit()
+        logger.info("Temporary silver table cleared.")
+
+    except Exception as e:
+        logger.error(f"Parallel CDC apply failed: {e}")
+        left_over = [gtrid for gtrid, _ in prepared if gtrid not in committed]
+        if committed:
+            # Past the first commit the run can only be completed, never rolled back
+            logger.error(
+                f"{len(committed)} partitions already committed. Prepared transactions left over, "
+                f"finish them with COMMIT PREPARED (see pg_prepared_xacts): {left_over}"
+            )
+        else:
+            for gtrid, partition_conn in prepared:
+                try:
+                    partition_conn.tpc_rollback()
+                    left_over.remove(gtrid)
+                except Exception as rollback_error:
+                    logger.error(f"Rollback of prepared partition {gtrid} failed, check pg_prepared_xacts: {rollback_error}")
+        if conn:
+            conn.rollback()
+        raise e
+
+    finally:
+        for gtrid, partition_conn in prepared:
+            # A connection still holding a prepared transaction is not handed out again
+            connection_pool.putconn(partition_conn, close=gtrid not in committed)
+        if conn:
+            cursor.close()
+            release_connection(conn)
+            logger.info("Connection closed.")
+
+def process_cdc_changes(effective_at=None):
+    if CDC_PARALLEL_WORKERS > 1 and is_embedded():
+        logger.warning("Parallel CDC apply needs PostgreSQL prepared transactions, using the sequential apply.")
+    elif CDC_PARALLEL_WORKERS > 1:
+        # Every worker holds a pooled connection until the commit phase
+        workers = min(CDC_PARALLEL_WORKERS, available_pool_connections())
+        if workers < CDC_PARALLEL_WORKERS:
+            logger.warning(
+                f"CDC_PARALLEL_WORKERS={CDC_PARALLEL_WORKERS} exceeds the free connections of the pool "
+                f"(POSTGRES_POOL_SIZE), using {workers} workers."
+            )
+        if workers > 1:
+            return process_cdc_changes_parallel(workers, effective_at)
+    if CDC_BATCH_SIZE > 0:
+        return process_cdc_changes_batched(CDC_BATCH_SIZE, effective_at)
+
+    conn = None
+    try:
         conn = db_connection()
         cursor = conn.cursor()
         logger.info("CDC transaction started.")
 
-        process_insert(cursor)
-        process_update(cursor)
-        process_delete(cursor)
+        create_history_table(cursor)
+        apply_change_set(cursor, effective_at=effective_at)
 
         cursor.execute("TRUNCATE TABLE silver.tmp_employees;")
         logger.info("Temporary silver table cleared.")
@@ -80,13 +397,13 @@ def process_cdc_changes():
         if conn:
             conn.rollback()
         raise e
-        
+
     finally:
         if conn:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             logger.info("Connection closed.")
 
 if __name__ == "__main__":
     setup_logging("process_cdc")
-    process_cdc_changes()
\ No newline at end of file
+    process_cdc_changes()
@@ -0,0 +1,146 @@
+import glob
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from scripts.sql_backend import is_embedded
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: capture EXPLAIN (ANALYZE, BUFFERS) plans of the pipeline SQL and compare them across runs
+PROFILE_SQL = os.getenv("PROFILE_SQL", "false").lower() == "true"
+
+PLAN_DIR = os.path.join("output", "plans")
+
+# Row estimates off by more than this factor (either way) are reported
+ESTIMATE_MISS_FACTOR = 10
+
+_run_id = None
+
+def start_profile_run():
+    """
+    Starts a new run id; called once per ETL cycle. It names the plan directory
+    and is passed on to the Gold Parquet snapshots of the same cycle.
+    """
+    global _run_id
+    _run_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return _run_id
+
+def _iter_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _iter_nodes(child)
+
+def plan_shape(node):
+    """
+    Structural signature of a plan: node types, join types and strategies, without costs or row counts.
+    """
+    name = node["Node Type"]
+    details = [node[key] for key in ("Join Type", "Strategy", "Relation Name") if key in node]
+    if details:
+        name += f"({', '.join(details)})"
+
+    children = node.get("Plans", [])
+    if children:
+        name += "[" + ", ".join(plan_shape(child) for child in children) + "]"
+    return name
+
+def plan_warnings(plan):
+    """
+    Row-estimate misses and disk spills of an analyzed plan.
+    """
+    warnings = []
+    for node in _iter_nodes(plan):
+        if "Actual Rows" not in node:
+            continue
+
+        # Both are per loop, so the inner side of a nested loop compares like for like
+        estimated = max(node["Plan Rows"], 1)
+        actual = max(node["Actual Rows"], 1)
+        if max(estimated, actual) / min(estimated, actual) > ESTIMATE_MISS_FACTOR:
+            warnings.append(
+                f"{node['Node Type']}: estimated {node['Plan Rows']} rows, actual {node['Actual Rows']} "
+                f"(per loop, {node.get('Actual Loops', 1)} loops)"
+            )
+
+        if node.get("Sort Space Type") == "Disk":
+            warnings.append(f"{node['Node Type']}: sort spilled to disk ({node.get('Sort Space Used')} kB)")
+        if node.get("Hash Batches", 1) > 1:
+            warnings.append(f"{node['Node Type']}: hash spilled to disk ({node['Hash Batches']} batches)")
+
+    return warnings
+
+def _previous_plan(label):
+    for run_dir in sorted(glob.glob(os.path.join(PLAN_DIR, "*")), reverse=True):
+        if os.path.basename(run_dir) == _run_id:
+            continue
+        plan_file = os.path.join(run_dir, f"{label}.json")
+        if os.path.exists(plan_file):
+            with open(plan_file, encoding="utf-8") as f:
+                return json.load(f)
+    return None
+
+def _save_plan(label, record):
+    run_dir = os.path.join(PLAN_DIR, _run_id or start_profile_run())
+    os.makedirs(run_dir, exist_ok=True)
+
+    # Concurrent partitions may write the same label, the file is swapped in atomically
+    tmp_file = os.path.join(run_dir, f".{label}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2, default=str)
+    os.replace(tmp_file, os.path.join(run_dir, f"{label}.json"))
+
+def capture_plan(cursor, label, query, params=None):
+    """
+    Runs EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) for a statement inside a savepoint
+    that is rolled back, so the statement itself has no effect. The plan is stored
+    for this run and compared with the previous run's plan of the same label.
+    """
+    cursor.execute("SAVEPOINT plan_capture;")
+    try:
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", params)
+        result = cursor.fetchone()[0]
+    except Exception as e:
+        logger.warning(f"[plan] {label}: plan capture failed: {e}")
+        return None
+    finally:
+        cursor.execute("ROLLBACK TO SAVEPOINT plan_capture;")
+
+    if isinstance(result, str):
+        result = json.loads(result)
+    plan = result[0]["Plan"]
+
+    record = {
+        "label": label,
+        "query": query,
+        "shape": plan_shape(plan),
+        "execution_time_ms": result[0].get("Execution Time"),
+        "plan": result,
+    }
+    _save_plan(label, record)
+
+    previous = _previous_plan(label)
+    if previous and previous["shape"] != record["shape"]:
+        logger.warning(f"[plan] {label}: plan shape changed\n  before: {previous['shape']}\n  now:    {record['shape']}")
+
+    for warning in plan_warnings(plan):
+        logger.warning(f"[plan] {label}: {warning}")
+
+    logger.info(f"[plan] {label}: {record['execution_time_ms']} ms, {record['shape']}")
+    return record
+
+def profile_query(cursor, label, query, params=None):
+    """
+    Captures the plan of a query when PROFILE_SQL is enabled (PostgreSQL only).
+    """
+    if PROFILE_SQL and not is_embedded():
+        return capture_plan(cursor, label, query, params)
+    return None
+
+def profiled_execute(cursor, label, query, params=None):
+    """
+    Executes a pipeline statement, capturing its plan first when PROFILE_SQL is enabled.
+    """
+    profile_query(cursor, label, query, params)
+    cursor.execute(query, params)
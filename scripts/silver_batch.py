@@ -0,0 +1,195 @@
+import logging
+import os
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from scripts.silver_transformations import *
+from scripts.silver_validation import QUARANTINE_TABLE, validate_batch, quarantine_rows, log_reject_rates
+from scripts.silver_dedup import deduplicate_batch, write_duplicate_report
+from scripts.sql_backend import is_embedded
+from scripts.db_connector import (
+    db_connection, release_connection, get_connection_pool, MIN_EMPLOYEE_ID, MAX_EMPLOYEE_ID
+)
+
+logger = logging.getLogger(__name__)
+
+def silver_shards():
+    """
+    Number of employee_id shards (SILVER_SHARDS) cleaned in parallel processes; 1 keeps the serial path.
+    The embedded database file can only be written by one process, so it always runs serially.
+    """
+    if is_embedded():
+        return 1
+    return int(os.getenv("SILVER_SHARDS", "1"))
+
+RAW_COLUMNS = [
+    "employee_id", "first_name", "last_name", "department", "email", "phone",
+    "status", "salary", "joining_date", "termination_date", "address"
+]
+
+SILVER_COLUMNS = [
+    "employee_id", "first_name", "last_name", "department", "email", "phone",
+    "status", "salary", "joining_date", "termination_date", "status_flag", "address", "updated_at"
+]
+
+def transform_rows(raw_rows):
+    """
+    Applies the silver_transformations cleaners to raw Bronze rows.
+    Values after the 11 raw columns are passed through unchanged.
+    """
+    updated_at = date.today()
+    insert_list = []
+    for row in raw_rows:
+        employee_id = row[0]
+        first_name = clean_names(row[1])
+        last_name = clean_names(row[2])
+        department = row[3]
+        email = clean_email(row[4])
+        phone = clean_phone(row[5])
+        status = row[6]
+        salary = clean_salary(row[7]) if row[7] is not None else None
+        joining_date, termination_date, status_flag = clean_employment_dates(status, row[8], row[9])
+        address = clean_address(row[10])
+
+        clean_list = (employee_id, first_name, last_name, department, email, phone, status, salary,
+                      joining_date, termination_date, status_flag, address, updated_at)
+        insert_list.append(clean_list + tuple(row[11:]))
+
+    return insert_list
+
+def _source_filter(id_range, batch_timestamp=None):
+    conditions, params = [], ()
+    if batch_timestamp is not None:
+        # A constant ingestion_timestamp lets PostgreSQL prune every other Bronze partition
+        conditions.append("ingestion_timestamp = %s")
+        params += (batch_timestamp,)
+
+    if id_range is not None:
+        lower, upper = id_range
+        if lower == MIN_EMPLOYEE_ID:
+            # Rows without an id belong to the first shard, like in the serial path
+            conditions.append("(employee_id IS NULL OR employee_id <= %s)")
+            params += (upper,)
+        else:
+            conditions.append("employee_id > %s AND employee_id <= %s")
+            params += (lower, upper)
+
+    if not conditions:
+        return "", ()
+    return "WHERE " + " AND ".join(conditions), params
+
+def load_silver_batch(cursor, source_table, target_table, extra_columns=(), id_range=None, batch_timestamp=None):
+    """
+    Reads raw rows (all of them or one employee_id range, optionally of one Bronze batch),
+    cleans, deduplicates and validates them, inserts valid rows into the Silver table
+    and quarantines the rest. The caller owns the transaction.
+    """
+    select_columns = ", ".join(RAW_COLUMNS + list(extra_columns))
+    source_filter, source_params = _source_filter(id_range, batch_timestamp)
+    cursor.execute(f"SELECT {select_columns} FROM {source_table} {source_filter};", source_params)
+    raw_data = cursor.fetchall()
+
+    reset_cache_stats()
+    insert_list = transform_rows(raw_data)
+    log_cache_stats(target_table)
+
+    insert_columns = SILVER_COLUMNS + list(extra_columns)
+
+    # Validation comes first, so an invalid duplicate can never win over a valid record of the same employee
+    validated_count = len(insert_list)
+    insert_list, rejected_rows, reject_counts = validate_batch(insert_list, insert_columns)
+    quarantine_rows(cursor, rejected_rows, target_table, SILVER_COLUMNS)
+    log_reject_rates(target_table, reject_counts, validated_count)
+
+    insert_list, collapsed = deduplicate_batch(insert_list, insert_columns)
+    if collapsed:
+        write_duplicate_report(collapsed, SILVER_COLUMNS, target_table)
+
+    silver_insert_query = f'''
+    INSERT INTO {target_table}
+    ({", ".join(insert_columns)})
+    VALUES({", ".join(["%s"] * len(insert_columns))})
+    '''
+    cursor.executemany(silver_insert_query, insert_list)
+    return len(insert_list)
+
+def _load_shard(source_table, target_table, extra_columns, id_range, batch_timestamp):
+    """
+    Worker: cleans one employee_id range on its own pooled connection.
+    """
+    connection_pool = get_connection_pool()
+    conn = connection_pool.getconn()
+    try:
+        cursor = conn.cursor()
+        row_count = load_silver_batch(cursor, source_table, target_table, extra_columns, id_range, batch_timestamp)
+        conn.commit()
+        cursor.close()
+        return row_count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        connection_pool.putconn(conn)
+
+def shard_ranges(cursor, source_table, shards, batch_timestamp=None):
+    """
+    Splits the distinct employee_ids of the source table into ranges of similar size.
+    Distinct ids keep every duplicate of an id inside the same shard.
+    """
+    batch_filter, batch_params = "", ()
+    if batch_timestamp is not None:
+        batch_filter, batch_params = "AND ingestion_timestamp = %s", (batch_timestamp,)
+    cursor.execute(f'''
+    SELECT MAX(employee_id)
+    FROM (
+        SELECT employee_id, NTILE(%s) OVER (ORDER BY employee_id) AS shard
+        FROM (SELECT DISTINCT employee_id FROM {source_table} WHERE employee_id IS NOT NULL {batch_filter}) AS ids
+    ) AS shards
+    GROUP BY shard
+    ORDER BY 1
+    ''', (shards,) + batch_params)
+    upper_bounds = [row[0] for row in cursor.fetchall()][:-1] + [MAX_EMPLOYEE_ID]
+    lower_bounds = [MIN_EMPLOYEE_ID] + upper_bounds[:-1]
+    return list(zip(lower_bounds, upper_bounds))
+
+def load_silver_sharded(source_table, target_table, extra_columns=(), shards=None, batch_timestamp=None):
+    """
+    Runs the Silver cleaning of each employee_id shard in a separate process,
+    each reading and writing its own range over its own connection.
+    """
+    shards = shards or silver_shards()
+    conn = None
+    try:
+        conn = db_connection()
+        cursor = conn.cursor()
+        id_ranges = shard_ranges(cursor, source_table, shards, batch_timestamp)
+    finally:
+        if conn:
+            cursor.close()
+            release_connection(conn)
+
+    logger.info(f"Sharded Silver load: {len(id_ranges)} shards from '{source_table}'.")
+    try:
+        with ProcessPoolExecutor(max_workers=len(id_ranges)) as executor:
+            futures = [
+                executor.submit(_load_shard, source_table, target_table, tuple(extra_columns), id_range, batch_timestamp)
+                for id_range in id_ranges
+            ]
+            row_counts = [future.result() for future in futures]
+    except Exception:
+        # Shards commit on their own; leave the table and its rejects empty like a failed serial load
+        conn = None
+        try:
+            conn = db_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"TRUNCATE TABLE {target_table};")
+            cursor.execute(f"DELETE FROM {QUARANTINE_TABLE} WHERE target_table = %s;", (target_table,))
+            conn.commit()
+        except Exception as cleanup_error:
+            logger.error(f"Rows of the failed sharded load could not be removed from '{target_table}': {cleanup_error}")
+        finally:
+            if conn:
+                cursor.close()
+                release_connection(conn)
+        raise
+
+    return sum(row_counts)
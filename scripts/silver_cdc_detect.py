@@ -1,26 +1,72 @@
 import logging
-from scripts.db_connector import db_connection, setup_logging
+from scripts.db_connector import db_connection, setup_logging, release_connection
+from scripts.snapshot_delta import DELTA_EXTRACT_ENABLED
+from scripts.sql_backend import row_hash_sql
+from scripts.query_profiler import profile_query
+from scripts.silver_validation import QUARANTINE_TABLE
 
 logger = logging.getLogger(__name__)
 
-def create_cdc_view():
+# Columns whose change makes a row an UPDATE
+CDC_HASH_COLUMNS = ["first_name", "last_name", "salary", "department", "status"]
+
+# In delta mode silver.tmp_employees only holds changed rows, deletes are flagged explicitly
+DELTA_CDC_VIEW_QUERY = f'''
+CREATE OR REPLACE VIEW employees_cdc_view AS
+SELECT
+    new.employee_id AS employee_id,
+
+    CASE
+        WHEN new.delta_action = 'DELETE' THEN 'DELETE'
+        WHEN old.employee_id IS NULL THEN 'INSERT'
+        WHEN {row_hash_sql("new", CDC_HASH_COLUMNS)}
+            IS DISTINCT FROM
+            {row_hash_sql("old", CDC_HASH_COLUMNS)}
+            THEN 'UPDATE'
+        ELSE
+            'NO_CHANGE'
+    END AS cdc_action,
+
+    new.first_name,
+    new.last_name,
+    new.department,
+    new.email,
+    new.phone,
+    new.status,
+    new.salary,
+    new.joining_date,
+    new.termination_date,
+    new.address,
+    new.status_flag
+
+FROM silver.tmp_employees AS new
+LEFT JOIN silver.employees AS old
+    ON new.employee_id = old.employee_id;
+'''
+
+def create_cdc_view(delta_mode=DELTA_EXTRACT_ENABLED):
     conn = None
     try:
         conn = db_connection()
         cursor = conn.cursor()
         logger.info("Connection established for CDC View creation.")
 
-        cdc_view_query = '''
+        cdc_view_query = f'''
         CREATE OR REPLACE VIEW employees_cdc_view AS
         SELECT
             COALESCE(new.employee_id, old.employee_id) AS employee_id, 
 
             CASE 
                 WHEN old.employee_id IS NULL THEN 'INSERT'
-                WHEN new.employee_id IS NULL THEN 'DELETE'
-                WHEN MD5(CAST((new.first_name, new.last_name, new.salary, new.department, new.status) AS TEXT)) 
+                -- A quarantined row is missing from the snapshot but the employee was not removed
+                WHEN new.employee_id IS NULL AND NOT EXISTS (
+                    SELECT 1 FROM {QUARANTINE_TABLE} AS q
+                    WHERE q.target_table = 'silver.tmp_employees' AND q.employee_id = old.employee_id
+                ) THEN 'DELETE'
+                WHEN new.employee_id IS NULL THEN 'NO_CHANGE'
+                WHEN {row_hash_sql("new", CDC_HASH_COLUMNS)} 
                     IS DISTINCT FROM 
-                    MD5(CAST((old.first_name, old.last_name, old.salary, old.department, old.status) AS TEXT))
+                    {row_hash_sql("old", CDC_HASH_COLUMNS)}
                     THEN 'UPDATE'
                 ELSE 
                     'NO_CHANGE'
@@ -43,7 +89,12 @@ def create_cdc_view():
             ON new.employee_id = old.employee_id;
         '''
         
+        if delta_mode:
+            cdc_view_query = DELTA_CDC_VIEW_QUERY
+            logger.info("Delta mode: CDC view built from staged changes only.")
+
         cursor.execute(cdc_view_query)
+        profile_query(cursor, "cdc_view", "SELECT * FROM employees_cdc_view")
         conn.commit()
         logger.info("CDC View (employees_cdc_view) created or updated successfully.")
 
@@ -56,7 +107,7 @@ def create_cdc_view():
     finally:
         if conn:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             logger.info("Connection closed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+import pandas as pd
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Which record survives when an extract repeats an employee_id: "last_row" or "latest_joining_date"
+DEDUP_SURVIVORSHIP = os.getenv("DEDUP_SURVIVORSHIP", "last_row")
+
+DEDUP_REPORT_DIR = os.path.join("output", "reports")
+
+SURVIVORSHIP_RULES = ("last_row", "latest_joining_date")
+
+def deduplicate_batch(insert_list, columns, rule=DEDUP_SURVIVORSHIP):
+    """
+    Collapses repeated employee_ids in a cleaned batch with one hash-based pass.
+    Returns the surviving rows (in their original order) and the collapsed ones.
+    Rows without an employee_id are left to validation.
+    """
+    if rule not in SURVIVORSHIP_RULES:
+        raise ValueError(f"Unknown survivorship rule '{rule}', expected one of {SURVIVORSHIP_RULES}")
+
+    if not insert_list:
+        return insert_list, []
+
+    df = pd.DataFrame(insert_list, columns=columns)[["employee_id", "joining_date"]]
+    df = df[df["employee_id"].notna()]
+    if not df["employee_id"].duplicated().any():
+        return insert_list, []
+
+    if rule == "latest_joining_date":
+        # Stable sort: on equal dates the later row still wins
+        df = df.sort_values("joining_date", kind="stable", na_position="first")
+
+    collapsed_index = set(df.index[df["employee_id"].duplicated(keep="last")])
+    survivors = [row for i, row in enumerate(insert_list) if i not in collapsed_index]
+    collapsed = [insert_list[i] for i in sorted(collapsed_index)]
+
+    return survivors, collapsed
+
+def write_duplicate_report(collapsed, columns, target_table, rule=DEDUP_SURVIVORSHIP):
+    """
+    Writes the collapsed duplicates to a CSV report under output/reports.
+    """
+    os.makedirs(DEDUP_REPORT_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = os.path.join(DEDUP_REPORT_DIR, f"duplicates_{target_table}_{timestamp}_{os.getpid()}.csv")
+
+    report = pd.DataFrame([row[:len(columns)] for row in collapsed], columns=columns)
+    report["survivorship_rule"] = rule
+    report.to_csv(report_path, index=False)
+
+    logger.warning(f"[{target_table}] {len(collapsed)} duplicate records collapsed ({rule}). Report: '{report_path}'")
+    return report_path
@@ -0,0 +1,154 @@
+import pandas as pd
+import logging
+from scripts.db_connector import db_connection, setup_logging, id_range_clause, release_connection
+from scripts.sql_backend import is_embedded, auto_id_column
+from scripts.query_profiler import profiled_execute
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COLUMNS = [
+    "employee_id", "first_name", "last_name", "department", "email", "phone",
+    "status", "salary", "joining_date", "termination_date", "status_flag", "address"
+]
+
+def create_history_table(cursor):
+    """
+    SCD Type 2 table: one row per employee version, valid in [valid_from, valid_to).
+    The current version of an employee has valid_to = NULL.
+    """
+    history_id_column = auto_id_column(cursor, "silver.employees_history_seq")
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS silver.employees_history(
+        history_id {history_id_column},
+        employee_id INT NOT NULL,
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        department VARCHAR(100),
+        email VARCHAR(200),
+        phone VARCHAR(20),
+        status VARCHAR(15),
+        salary INT,
+        joining_date DATE,
+        termination_date DATE,
+        status_flag BOOLEAN,
+        address TEXT,
+        valid_from TIMESTAMP NOT NULL,
+        valid_to TIMESTAMP
+    )
+    ''')
+
+    # The embedded columnar engine scans instead; it has no partial or GiST indexes
+    if is_embedded():
+        return
+
+    # Partial index: at most one open version per employee, and fast current-row lookups
+    cursor.execute('''
+    CREATE UNIQUE INDEX IF NOT EXISTS employees_history_current_idx
+    ON silver.employees_history (employee_id)
+    WHERE valid_to IS NULL
+    ''')
+
+    # Range index for as-of queries (a NULL valid_to is an unbounded upper end)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS employees_history_validity_idx
+    ON silver.employees_history
+    USING gist (tsrange(valid_from, valid_to, '[)'))
+    ''')
+
+def clear_history(cursor):
+    """
+    Empties silver.employees_history before a replay that rebuilds it from an older snapshot.
+    Returns the number of versions that were stored.
+    """
+    create_history_table(cursor)
+    cursor.execute("SELECT COUNT(*) FROM silver.employees_history;")
+    version_count = cursor.fetchone()[0]
+    cursor.execute("DELETE FROM silver.employees_history;")
+    return version_count
+
+def close_history_versions(cursor, effective_at=None, source="employees_cdc_view", id_range=None):
+    """
+    Ends the open version of every employee updated or deleted by the CDC change set.
+    Must run before the change set is applied, while the CDC view still shows it.
+    """
+    logger.info("Closing history versions...")
+    range_filter, range_params = id_range_clause(id_range, "view.employee_id")
+    close_query = f'''
+    UPDATE silver.employees_history AS history
+    SET valid_to = COALESCE(%s::TIMESTAMP, LOCALTIMESTAMP)
+    FROM {source} AS view
+    WHERE history.employee_id = view.employee_id
+        AND history.valid_to IS NULL
+        AND view.cdc_action IN ('UPDATE', 'DELETE'){range_filter};
+    '''
+    profiled_execute(cursor, "history_close", close_query, (effective_at,) + range_params)
+    logger.info(f" -> {cursor.rowcount} history versions closed.")
+
+def open_history_versions(cursor, effective_at=None, id_range=None):
+    """
+    Opens a new version for every Silver employee without a current one.
+    After the CDC apply this covers inserts and updates, and bootstraps the table on its first run.
+    """
+    logger.info("Opening history versions...")
+    columns = ", ".join(HISTORY_COLUMNS)
+    range_filter, range_params = id_range_clause(id_range, "main.employee_id")
+    open_query = f'''
+    INSERT INTO silver.employees_history ({columns}, valid_from)
+    SELECT {columns}, COALESCE(%s::TIMESTAMP, LOCALTIMESTAMP)
+    FROM silver.employees AS main
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM silver.employees_history AS history
+        WHERE history.employee_id = main.employee_id
+            AND history.valid_to IS NULL
+    ){range_filter};
+    '''
+    profiled_execute(cursor, "history_open", open_query, (effective_at,) + range_params)
+    logger.info(f" -> {cursor.rowcount} history versions opened.")
+
+def get_employees_as_of(as_of):
+    """
+    Returns the Silver employee rows as they were at the given date or timestamp.
+    Served by the range index, without replaying old snapshots.
+    """
+    conn = None
+    try:
+        conn = db_connection()
+        cursor = conn.cursor()
+
+        columns = ", ".join(HISTORY_COLUMNS)
+        as_of_query = f'''
+        SELECT {columns}
+        FROM silver.employees_history
+        WHERE tsrange(valid_from, valid_to, '[)') @> %s::TIMESTAMP
+        ORDER BY employee_id;
+        '''
+        as_of_params = (as_of,)
+        if is_embedded():
+            as_of_query = f'''
+            SELECT {columns}
+            FROM silver.employees_history
+            WHERE valid_from <= %s::TIMESTAMP AND (valid_to IS NULL OR valid_to > %s::TIMESTAMP)
+            ORDER BY employee_id;
+            '''
+            as_of_params = (as_of, as_of)
+
+        cursor.execute(as_of_query, as_of_params)
+        rows = cursor.fetchall()
+        logger.info(f"{len(rows)} employee versions valid at {as_of}.")
+
+        return pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+
+    except Exception as e:
+        logger.error(f"As-of query failed: {e}")
+        raise e
+
+    finally:
+        if conn:
+            cursor.close()
+            release_connection(conn)
+
+if __name__ == "__main__":
+    import sys
+    setup_logging("silver_history")
+    print(get_employees_as_of(sys.argv[1]))
@@ -1,10 +1,29 @@
 import logging
-from datetime import date
-from scripts.silver_transformations import *
-from scripts.db_connector import db_connection, setup_logging
+from scripts.silver_batch import silver_shards, load_silver_batch, load_silver_sharded
+from scripts.silver_validation import prepare_quarantine
+from scripts.db_connector import db_connection, setup_logging, release_connection
+from scripts.bronze_main_load import current_bronze_batch
+from scripts.process_cdc import create_apply_run_table, abandon_unfinished_runs
 
 logger = logging.getLogger(__name__)
 
+def silver_layer_exists():
+    """True once silver.employees has been built; later cycles only change it through CDC."""
+    conn = None
+    try:
+        conn = db_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT COUNT(*)
+        FROM information_schema.tables
+        WHERE table_schema = 'silver' AND table_name = 'employees';
+        ''')
+        return cursor.fetchone()[0] > 0
+    finally:
+        if conn:
+            cursor.close()
+            release_connection(conn)
+
 def load_silver_layer():
     conn = None
     try:
@@ -13,6 +32,10 @@ def load_silver_layer():
         logger.info("Connection established.")
 
         cursor.execute("DROP TABLE IF EXISTS silver.employees CASCADE;")
+
+        # An interrupted chunked CDC run must never be resumed on top of a rebuilt Silver
+        create_apply_run_table(cursor)
+        abandon_unfinished_runs(cursor, "silver.employees rebuilt")
         conn.commit()
 
         create_silver_table = '''
@@ -37,38 +60,19 @@ def load_silver_layer():
         logger.info("Silver table created.")
 
         cursor.execute("TRUNCATE TABLE silver.employees;")
+        prepare_quarantine(cursor, "silver.employees")
         conn.commit()
 
-        cursor.execute("SELECT * FROM bronze.employees;")
-        raw_data = cursor.fetchall()
-
-        insert_list = []
-        for row in raw_data:
-            employee_id = row[0]
-            first_name = clean_names(row[1])
-            last_name = clean_names(row[2])
-            department = row[3]
-            email = clean_email(row[4])
-            phone = clean_phone(row[5])
-            status = row[6]
-            salary = clean_salary(row[7]) if row[7] is not None else None
-            joining_date, termination_date, status_flag = clean_employment_dates(status, row[8], row[9])
-            address = clean_address(row[10])
-            updated_at = date.today()
-
-            clean_list = (employee_id, first_name, last_name, department, email, phone, status, salary, joining_date, termination_date, status_flag, address, updated_at)
-            insert_list.append(clean_list)
+        # Bronze is append-only: only the latest batch is read, from its own partition
+        batch_timestamp = current_bronze_batch(cursor)
+        logger.info(f"Reading Bronze batch {batch_timestamp}.")
 
-        silver_insert_query = '''
-        INSERT INTO silver.employees
-        (employee_id, first_name, last_name, department, email, phone,
-          status, salary, joining_date, termination_date, status_flag, address, updated_at)
-        VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        '''
-
-        cursor.executemany(silver_insert_query, insert_list)
-        conn.commit()
-        logger.info(f"Inserted {len(insert_list)} rows into Silver.")
+        if silver_shards() > 1:
+            row_count = load_silver_sharded("bronze.employees", "silver.employees", batch_timestamp=batch_timestamp)
+        else:
+            row_count = load_silver_batch(cursor, "bronze.employees", "silver.employees", batch_timestamp=batch_timestamp)
+            conn.commit()
+        logger.info(f"Inserted {row_count} rows into Silver.")
 
     except Exception as e:
         logger.error(f"Silver load failed: {e}")
@@ -79,7 +83,7 @@ def load_silver_layer():
     finally:
         if conn:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             logger.info("Connection closed.")
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 import logging
-from datetime import date
-from scripts.silver_transformations import *
-from scripts.db_connector import db_connection, setup_logging
+from scripts.silver_batch import silver_shards, load_silver_batch, load_silver_sharded
+from scripts.silver_validation import prepare_quarantine
+from scripts.db_connector import db_connection, setup_logging, release_connection
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +29,8 @@ def load_silver_tmp_layer():
             termination_date DATE,
             status_flag BOOLEAN,
             address TEXT,
-            updated_at DATE 
+            updated_at DATE,
+            delta_action TEXT
         )
         '''
         cursor.execute(create_tmp_silver_table)
@@ -37,39 +38,15 @@ def load_silver_tmp_layer():
         logger.info("Temporary silver table created.")
 
         cursor.execute("TRUNCATE TABLE silver.tmp_employees;")
+        prepare_quarantine(cursor, "silver.tmp_employees")
         conn.commit()
 
-        cursor.execute("SELECT * FROM bronze.tmp_employees;")
-        raw_data = cursor.fetchall()
-
-        insert_list = []
-        for row in raw_data:
-            employee_id = row[0]
-            first_name = clean_names(row[1])
-            last_name = clean_names(row[2])
-            department = row[3]
-            email = clean_email(row[4])
-            phone = clean_phone(row[5])
-            status = row[6]
-            salary = clean_salary(row[7]) if row[7] is not None else None
-            joining_date, termination_date, status_flag = clean_employment_dates(status, row[8], row[9])
-            address = clean_address(row[10])
-            updated_at = date.today()
-
-            clean_list = (employee_id, first_name, last_name, department, email, phone, status, salary, 
-                          joining_date, termination_date, status_flag, address, updated_at)
-            insert_list.append(clean_list)
-
-        silver_insert_query = '''
-        INSERT INTO silver.tmp_employees
-        (employee_id, first_name, last_name, department, email, phone, status, salary, 
-         joining_date, termination_date, status_flag, address, updated_at)
-        VALUES(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        '''
-
-        cursor.executemany(silver_insert_query, insert_list)
-        conn.commit()
-        logger.info(f"Inserted {len(insert_list)} rows into Silver TMP.")
+        if silver_shards() > 1:
+            row_count = load_silver_sharded("bronze.tmp_employees", "silver.tmp_employees", ["delta_action"])
+        else:
+            row_count = load_silver_batch(cursor, "bronze.tmp_employees", "silver.tmp_employees", ["delta_action"])
+            conn.commit()
+        logger.info(f"Inserted {row_count} rows into Silver TMP.")
 
     except Exception as e:
         logger.error(f"Silver TMP load failed: {e}")
@@ -80,7 +57,7 @@ def load_silver_tmp_layer():
     finally:
         if conn:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             logger.info("Connection closed.")
 
 if __name__ == "__main__":
@@ -1,7 +1,108 @@
 import pandas as pd
+import functools
+import logging
+import os
 import re
+from collections import OrderedDict
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Bounded LRU cache size per field; 0 disables memoization
+CLEANING_CACHE_SIZE = int(os.getenv("CLEANING_CACHE_SIZE", "4096"))
+
+# A cache whose hit ratio is below the minimum after the probe window switches itself off
+CACHE_PROBE_LOOKUPS = 10000
+CACHE_MIN_HIT_RATIO = 0.3
+
+_FIELD_CACHES = {}
+
+class FieldCache:
+    """
+    LRU cache of cleaned values for one field, with hit/miss counters.
+    HR fields are highly repetitive, so most values are computed only once.
+    """
+    def __init__(self, field, maxsize=CLEANING_CACHE_SIZE):
+        self.field = field
+        self.maxsize = maxsize
+        self.enabled = maxsize > 0
+        self.hits = 0
+        self.misses = 0
+        # Probe counters cover the first CACHE_PROBE_LOOKUPS lookups and are never reset per batch
+        self.probe_hits = 0
+        self.probe_lookups = 0
+        self.probe_done = False
+        self._values = OrderedDict()
+
+    def lookup(self, func, value):
+        if not self.enabled:
+            return func(value)
+
+        if value in self._values:
+            self._values.move_to_end(value)
+            self.hits += 1
+            hit = True
+            result = self._values[value]
+        else:
+            self.misses += 1
+            hit = False
+            result = func(value)
+            self._values[value] = result
+            if len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+        if not self.probe_done:
+            self.probe_lookups += 1
+            self.probe_hits += hit
+            if self.probe_lookups >= CACHE_PROBE_LOOKUPS:
+                self.probe_done = True
+                self._check_cardinality()
+
+        return result
+
+    def _check_cardinality(self):
+        hit_ratio = self.probe_hits / self.probe_lookups
+        if hit_ratio < CACHE_MIN_HIT_RATIO:
+            self.enabled = False
+            self._values.clear()
+            logger.info(f"Cleaning cache '{self.field}' disabled: hit ratio {hit_ratio:.1%}, cardinality too high.")
+
+def _memoized(field):
+    def decorator(func):
+        cache = FieldCache(field)
+        _FIELD_CACHES[field] = cache
+
+        @functools.wraps(func)
+        def wrapper(value):
+            return cache.lookup(func, value)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+def get_cache_stats():
+    """Returns hit/miss counters per cached field since the last reset."""
+    return {
+        field: {"hits": cache.hits, "misses": cache.misses, "size": len(cache._values), "enabled": cache.enabled}
+        for field, cache in _FIELD_CACHES.items()
+    }
+
+def reset_cache_stats():
+    """Resets the counters only; cached values stay warm for the next batch."""
+    for cache in _FIELD_CACHES.values():
+        cache.hits = 0
+        cache.misses = 0
+
+def log_cache_stats(stage):
+    for field, stats in get_cache_stats().items():
+        lookups = stats["hits"] + stats["misses"]
+        if not stats["enabled"] or lookups == 0:
+            continue
+        logger.info(
+            f"[{stage}] cache '{field}': {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hits'] / lookups:.1%} hit ratio, {stats['size']} entries)."
+        )
+
 def clean_names(name):
     if pd.isna(name):
         return None
@@ -9,6 +110,7 @@ def clean_names(name):
     return str(name).strip().title()
     
 
+@_memoized("email")
 def clean_email(email):
     if pd.isna(email):
         return None
@@ -44,6 +146,7 @@ def clean_phone(phone):
     return digits
     
 
+@_memoized("salary")
 def clean_salary(raw_salary):
     if pd.isna(raw_salary):
         return None
@@ -56,18 +159,20 @@ def clean_salary(raw_salary):
     return abs(int(salary))
 
 
-def clean_employment_dates(status, raw_join, raw_term):
-    def _fix_format(date_value):
-        if pd.isna(date_value):
-            return None
-        
-        date_str = str(date_value).strip()
-        
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m-%d")
-        except ValueError:
-            return None
+@_memoized("date")
+def _fix_format(date_value):
+    if pd.isna(date_value):
+        return None
+    
+    date_str = str(date_value).strip()
+    
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
 
+
+def clean_employment_dates(status, raw_join, raw_term):
     clean_join = _fix_format(raw_join)
     clean_term = _fix_format(raw_term)
 
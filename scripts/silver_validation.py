@@ -0,0 +1,84 @@
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_TABLE = "silver.employees_quarantine"
+
+# Reason code -> vectorized check over the cleaned batch, True marks a rejected row
+VALIDATION_RULES = {
+    "MISSING_EMPLOYEE_ID": lambda df: df["employee_id"].isna(),
+    "INVALID_EMPLOYMENT_DATES": lambda df: df["status_flag"].fillna(False).astype(bool),
+}
+
+def prepare_quarantine(cursor, target_table):
+    """
+    Creates the quarantine table if needed and clears the previous rejects of the target table.
+    """
+    cursor.execute(f'''
+    CREATE TABLE IF NOT EXISTS {QUARANTINE_TABLE}(
+        employee_id INT,
+        first_name VARCHAR(100),
+        last_name VARCHAR(100),
+        department VARCHAR(100),
+        email VARCHAR(200),
+        phone VARCHAR(20),
+        status VARCHAR(15),
+        salary INT,
+        joining_date DATE,
+        termination_date DATE,
+        status_flag BOOLEAN,
+        address TEXT,
+        updated_at DATE,
+        target_table VARCHAR(50),
+        reason_codes TEXT[],
+        quarantined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute(f"DELETE FROM {QUARANTINE_TABLE} WHERE target_table = %s;", (target_table,))
+
+def validate_batch(insert_list, columns):
+    """
+    Runs every validation rule over the whole batch at once.
+    Returns the valid rows, the rejected rows with their reason codes, and the reject count per rule.
+    """
+    if not insert_list:
+        return [], [], {rule: 0 for rule in VALIDATION_RULES}
+
+    df = pd.DataFrame(insert_list, columns=columns)
+    rule_hits = pd.DataFrame({rule: check(df) for rule, check in VALIDATION_RULES.items()})
+    rejected = rule_hits.any(axis=1)
+
+    valid_rows = [insert_list[i] for i in rejected.index[~rejected]]
+    rejected_rows = []
+    if rejected.any():
+        # "RULE_A,RULE_B," per rejected row, without a Python loop over the rules
+        reason_codes = rule_hits[rejected].dot(rule_hits.columns + ",").str.rstrip(",").str.split(",")
+        rejected_rows = [(insert_list[i], reason_codes[i]) for i in reason_codes.index]
+
+    reject_counts = rule_hits.sum().astype(int).to_dict()
+
+    return valid_rows, rejected_rows, reject_counts
+
+def quarantine_rows(cursor, rejected_rows, target_table, silver_columns):
+    """
+    Inserts rejected rows into the quarantine table. Pass-through columns are dropped.
+    """
+    if not rejected_rows:
+        return
+
+    columns = list(silver_columns) + ["target_table", "reason_codes"]
+    quarantine_query = f'''
+    INSERT INTO {QUARANTINE_TABLE}
+    ({", ".join(columns)})
+    VALUES({", ".join(["%s"] * len(columns))})
+    '''
+    cursor.executemany(quarantine_query, [
+        tuple(row[:len(silver_columns)]) + (target_table, reasons)
+        for row, reasons in rejected_rows
+    ])
+
+def log_reject_rates(target_table, reject_counts, batch_size):
+    for rule, count in reject_counts.items():
+        rate = count / batch_size if batch_size else 0
+        logger.info(f"[{target_table}] reject rate {rule}: {count}/{batch_size} ({rate:.2%}).")
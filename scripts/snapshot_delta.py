@@ -0,0 +1,155 @@
+import csv
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import zlib
+from scripts.bronze_ingest import SOURCE_COLUMNS, MASTER_FILE_NAME
+
+logger = logging.getLogger(__name__)
+
+# Stage only changed/new/deleted rows into bronze.tmp_employees instead of the full snapshot
+DELTA_EXTRACT_ENABLED = os.getenv("CDC_DELTA_EXTRACT", "false").lower() == "true"
+
+# Number of hash partitions; memory use is bounded by the largest previous partition
+DELTA_PARTITIONS = int(os.getenv("CDC_DELTA_PARTITIONS", "16"))
+
+DELTA_BATCH_SIZE = 5000
+
+MASTER_FILE = os.path.join("sources", MASTER_FILE_NAME)
+
+def _partition_index(employee_id, partitions):
+    # crc32 is stable across processes, unlike the built-in hash()
+    return zlib.crc32(employee_id.encode("utf-8")) % partitions
+
+def _row_digest(record):
+    return hashlib.md5("\x1f".join(record[:len(SOURCE_COLUMNS)]).encode("utf-8")).digest()
+
+def partition_snapshot(csv_paths, work_dir, partitions=DELTA_PARTITIONS):
+    """
+    Streams snapshot files into hash partitions on employee_id.
+    Each partition row holds the source columns followed by the file name.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    partition_paths = [os.path.join(work_dir, f"part_{i:04d}.csv") for i in range(partitions)]
+    handles = [open(path, "w", newline="", encoding="utf-8") for path in partition_paths]
+    writers = [csv.writer(handle) for handle in handles]
+
+    try:
+        for csv_path in csv_paths:
+            source_file = os.path.basename(csv_path)
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    continue
+                positions = [header.index(column) for column in SOURCE_COLUMNS]
+
+                for row in reader:
+                    if not row:
+                        continue
+                    record = [row[position] for position in positions]
+                    record[0] = record[0].strip()
+                    record.append(source_file)
+                    writers[_partition_index(record[0], partitions)].writerow(record)
+    finally:
+        for handle in handles:
+            handle.close()
+
+    return partition_paths
+
+def diff_partitions(previous_parts, current_parts):
+    """
+    Compares two partitioned snapshots and yields (delta_action, record) pairs.
+    Only a digest per previous row is kept in memory, one partition at a time.
+    """
+    for previous_path, current_path in zip(previous_parts, current_parts):
+        previous = {}
+        with open(previous_path, newline="", encoding="utf-8") as f:
+            for record in csv.reader(f):
+                previous[record[0]] = (_row_digest(record), record[-1])
+
+        with open(current_path, newline="", encoding="utf-8") as f:
+            for record in csv.reader(f):
+                old = previous.pop(record[0], None)
+                if old is None:
+                    yield "INSERT", record
+                elif old[0] != _row_digest(record):
+                    yield "UPDATE", record
+
+        # Whatever is left in the previous partition disappeared from the current snapshot
+        for employee_id, (_, source_file) in previous.items():
+            yield "DELETE", [employee_id] + [""] * (len(SOURCE_COLUMNS) - 1) + [source_file]
+
+def stage_delta(cursor, deltas, table="bronze.tmp_employees"):
+    """
+    Inserts delta rows into the Bronze staging table in bounded batches.
+    Returns the number of staged rows per delta action.
+    """
+    insert_query = f'''
+    INSERT INTO {table} (
+        employee_id, first_name, last_name, department, email, phone,
+        status, salary, joining_date, termination_date, address, source_file, delta_action
+    )
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    '''
+
+    counts = {"INSERT": 0, "UPDATE": 0, "DELETE": 0}
+    batch = []
+    for delta_action, record in deltas:
+        # Empty CSV fields become NULL, like the pandas based full load
+        batch.append(tuple(value if value != "" else None for value in record) + (delta_action,))
+        counts[delta_action] += 1
+
+        if len(batch) >= DELTA_BATCH_SIZE:
+            cursor.executemany(insert_query, batch)
+            batch = []
+
+    if batch:
+        cursor.executemany(insert_query, batch)
+
+    return counts
+
+def extract_snapshot_delta(cursor, previous_files, current_files):
+    """
+    Diffs the previous and current snapshot files out of core and stages
+    only new, changed and deleted employees.
+    """
+    with tempfile.TemporaryDirectory(prefix="snapshot_delta_") as work_dir:
+        previous_parts = partition_snapshot(previous_files, os.path.join(work_dir, "previous"))
+        current_parts = partition_snapshot(current_files, os.path.join(work_dir, "current"))
+        counts = stage_delta(cursor, diff_partitions(previous_parts, current_parts))
+
+    logger.info(
+        f"Snapshot delta staged: {counts['INSERT']} new, {counts['UPDATE']} changed, "
+        f"{counts['DELETE']} deleted."
+    )
+    return counts
+
+def promote_snapshot(current_files, master_file=MASTER_FILE):
+    """
+    Makes the processed snapshot the previous snapshot of the next run.
+    Files are streamed into a temporary file and swapped in atomically.
+    """
+    tmp_file = f"{master_file}.tmp"
+
+    if len(current_files) == 1:
+        shutil.copyfile(current_files[0], tmp_file)
+    else:
+        with open(tmp_file, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(SOURCE_COLUMNS)
+            for csv_path in current_files:
+                with open(csv_path, newline="", encoding="utf-8") as f:
+                    reader = csv.reader(f)
+                    header = next(reader, None)
+                    if header is None:
+                        continue
+                    positions = [header.index(column) for column in SOURCE_COLUMNS]
+                    for row in reader:
+                        if row:
+                            writer.writerow([row[position] for position in positions])
+
+    os.replace(tmp_file, master_file)
+    logger.info(f"Snapshot promoted to '{master_file}'.")
@@ -0,0 +1,140 @@
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUCKDB_PATH = os.path.join("output", "employee_lifecycle.duckdb")
+
+PIPELINE_SCHEMAS = ["bronze", "silver", "gold"]
+
+def is_embedded():
+    """
+    DB_BACKEND: "postgres" (default, Docker container) or "duckdb" (embedded, in-process, no server needed).
+    Read on every call: this module is imported before db_connector loads the .env file.
+    """
+    return os.getenv("DB_BACKEND", "postgres").lower() == "duckdb"
+
+def _translate(query):
+    """
+    Shims the PostgreSQL syntax used by the stages for DuckDB:
+    %s placeholders become ? and LOCALTIMESTAMP becomes a local timestamp cast.
+    """
+    query = query.replace("%s", "?")
+    return re.sub(r"\bLOCALTIMESTAMP\b", "CAST(current_timestamp AS TIMESTAMP)", query)
+
+class DuckDBCursor:
+    """
+    psycopg2-style cursor on top of a DuckDB connection (execute, executemany,
+    fetchone, fetchall, rowcount), so the stages run unchanged.
+    """
+    def __init__(self, connection):
+        self._connection = connection
+        self.rowcount = -1
+
+    def execute(self, query, params=None):
+        self._connection._begin()
+        query = _translate(query)
+        self._connection._duckdb.execute(query, list(params) if params else None)
+
+        # DuckDB returns the affected row count as a result row for DML statements
+        statement = query.lstrip().split(None, 1)[0].upper()
+        if statement in ("INSERT", "UPDATE", "DELETE") and "RETURNING" not in query.upper():
+            self.rowcount = self._connection._duckdb.fetchone()[0]
+        else:
+            self.rowcount = -1
+
+    def executemany(self, query, params_seq):
+        params_seq = [list(params) for params in params_seq]
+        self.rowcount = len(params_seq)
+        if not params_seq:
+            return
+
+        self._connection._begin()
+        self._connection._duckdb.executemany(_translate(query), params_seq)
+
+    def fetchone(self):
+        return self._connection._duckdb.fetchone()
+
+    def fetchall(self):
+        return self._connection._duckdb.fetchall()
+
+    def close(self):
+        pass
+
+class DuckDBConnection:
+    """
+    psycopg2-style connection: a transaction is opened lazily by the first
+    statement and ended by commit() or rollback(), like psycopg2's default mode.
+    """
+    def __init__(self, path=None):
+        path = path or os.getenv("DUCKDB_PATH", DEFAULT_DUCKDB_PATH)
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("DB_BACKEND=duckdb requires the 'duckdb' package (pip install duckdb).") from e
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._duckdb = duckdb.connect(path)
+        self._in_transaction = False
+        self.closed = False
+
+        # PostgreSQL schemas are created by the DBA, the embedded database creates its own
+        for schema in PIPELINE_SCHEMAS:
+            self._duckdb.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+
+    def _begin(self):
+        if not self._in_transaction:
+            self._duckdb.execute("BEGIN TRANSACTION;")
+            self._in_transaction = True
+
+    def cursor(self):
+        return DuckDBCursor(self)
+
+    def commit(self):
+        if self._in_transaction:
+            self._duckdb.execute("COMMIT;")
+            self._in_transaction = False
+
+    def rollback(self):
+        if self._in_transaction:
+            self._duckdb.execute("ROLLBACK;")
+            self._in_transaction = False
+
+    def close(self):
+        self.rollback()
+        self._duckdb.close()
+        self.closed = True
+
+class EmbeddedConnectionPool:
+    """
+    Pool interface for the embedded backend. DuckDB connections are cheap and
+    share one in-process database, so each getconn() opens a fresh one.
+    """
+    def getconn(self):
+        return DuckDBConnection()
+
+    def putconn(self, conn):
+        conn.close()
+
+    def closeall(self):
+        pass
+
+def row_hash_sql(alias, columns):
+    """
+    Hash of a set of columns used by CDC to detect changed rows.
+    """
+    fields = ", ".join(f"{alias}.{column}" for column in columns)
+    if is_embedded():
+        return f"MD5(CAST(ROW({fields}) AS VARCHAR))"
+    return f"MD5(CAST(({fields}) AS TEXT))"
+
+def auto_id_column(cursor, sequence_name):
+    """
+    Column definition of an auto-incremented primary key (BIGSERIAL on PostgreSQL,
+    a sequence default on DuckDB).
+    """
+    if is_embedded():
+        cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence_name};")
+        return f"BIGINT DEFAULT nextval('{sequence_name}') PRIMARY KEY"
+    return "BIGSERIAL PRIMARY KEY"